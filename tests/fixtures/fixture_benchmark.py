@@ -0,0 +1,93 @@
+import os
+import random
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from faker import Faker
+
+from posts.counters import reconcile_comment_counts, reconcile_post_counts
+from posts.models import Comment, Counter, Follow, Group, Post
+from posts.search import rebuild_search_index
+from posts.timelines import rebuild_timelines
+
+BENCH_SEED = 1234
+
+
+def bench_volume(name, default):
+    """Объём данных для бенчмарков, задаётся переменными BENCH_*."""
+    return int(os.environ.get(f'BENCH_{name}', default))
+
+
+def _seed(users, groups, posts, comments, follows):
+    fake = Faker()
+    fake.seed_instance(BENCH_SEED)
+    rnd = random.Random(BENCH_SEED)
+    User = get_user_model()
+    password = make_password('bench-password')
+    User.objects.bulk_create([
+        User(username=f'bench_user_{number}', password=password)
+        for number in range(users)
+    ])
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_user_').values_list('pk', flat=True))
+    Group.objects.bulk_create([
+        Group(title=fake.sentence(nb_words=3)[:200],
+              slug=f'bench-group-{number}',
+              description=fake.text(max_nb_chars=200))
+        for number in range(groups)
+    ])
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-').values_list('pk', flat=True))
+    # Первый пользователь — самый активный автор, как в реальных лентах.
+    author_weights = [1 / (rank + 1) for rank in range(len(user_ids))]
+    Post.objects.bulk_create([
+        Post(text=fake.text(max_nb_chars=300),
+             author_id=rnd.choices(user_ids, author_weights)[0],
+             group_id=rnd.choice(group_ids + [None]))
+        for _ in range(posts)
+    ])
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create([
+        Comment(text=fake.sentence(),
+                author_id=rnd.choice(user_ids),
+                post_id=rnd.choice(post_ids[:10]))
+        for _ in range(comments)
+    ])
+    pairs = {
+        (user_ids[0], author_id)
+        for author_id in rnd.sample(user_ids[1:], min(follows, users - 1))
+    }
+    Follow.objects.bulk_create([
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in pairs
+    ])
+    rebuild_timelines()
+    reconcile_post_counts()
+    reconcile_comment_counts()
+    rebuild_search_index()
+
+
+@pytest.fixture(scope='module')
+def bench_data(django_db_setup, django_db_blocker):
+    """Один набор данных на модуль бенчмарков, удаляется после него."""
+    with django_db_blocker.unblock():
+        _seed(
+            users=bench_volume('USERS', 100),
+            groups=bench_volume('GROUPS', 10),
+            posts=bench_volume('POSTS', 1000),
+            comments=bench_volume('COMMENTS', 200),
+            follows=bench_volume('FOLLOWS', 50),
+        )
+        User = get_user_model()
+        yield {
+            'user': User.objects.get(username='bench_user_0'),
+            'group': Group.objects.order_by('pk').first(),
+            'post': Post.objects.filter(comments__isnull=False).first(),
+        }
+        get_user_model().objects.filter(
+            username__startswith='bench_user_').delete()
+        Group.objects.filter(slug__startswith='bench-group-').delete()
+        Counter.objects.all().delete()
+        cache.clear()
@@ -0,0 +1,121 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from about import urls as about_urls
+from posts import urls as posts_urls
+from users import urls as users_urls
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), 'benchmarks_baseline.json'
+)
+UPDATE_BASELINE = os.environ.get('BENCH_UPDATE_BASELINE') == '1'
+# Время и память записаны на одной машине и на других (и в CI) ничего
+# не значат, поэтому сравниваются только по BENCH_TIMING=1.
+CHECK_TIMING = os.environ.get('BENCH_TIMING') == '1'
+# Время и память шумят, поэтому сравниваются с запасом; запросы — строго.
+TOLERANCE = float(os.environ.get('BENCH_TOLERANCE', 5))
+RUNS = int(os.environ.get('BENCH_RUNS', 3))
+
+
+def url_names():
+    for module in (posts_urls, users_urls, about_urls):
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{module.app_name}:{pattern.name}'
+
+
+def url_kwargs(name, data):
+    route_kwargs = {
+        'slug': data['group'].slug,
+        'username': data['user'].username,
+        'post_id': data['post'].pk,
+        'uidb64': urlsafe_base64_encode(force_bytes(data['user'].pk)),
+        'token': default_token_generator.make_token(data['user']),
+    }
+    for pattern in (posts_urls.urlpatterns + users_urls.urlpatterns
+                    + about_urls.urlpatterns):
+        if pattern.name == name.split(':')[1]:
+            return {key: route_kwargs[key] for key in pattern.pattern.converters}
+    return {}
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(name, result):
+    baseline = load_baseline()
+    baseline[name] = result
+    with open(BASELINE_PATH, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def measure(client, url):
+    """Холодный запрос: число SQL, медиана времени и пик памяти."""
+    timings = []
+    for _ in range(RUNS):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        # captured_queries читается лениво, а следующий запрос
+        # сбрасывает connection.queries, поэтому число фиксируется сразу.
+        query_count = len(queries.captured_queries)
+    cache.clear()
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return response.status_code, {
+        'queries': query_count,
+        'ms': round(statistics.median(timings), 2),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', list(url_names()))
+def test_view_within_baseline(name, bench_data):
+    client = Client()
+    client.force_login(bench_data['user'])
+    url = reverse(name, kwargs=url_kwargs(name, bench_data))
+    status, result = measure(client, url)
+    assert status < 500, f'Страница `{url}` отвечает ошибкой {status}'
+    if UPDATE_BASELINE:
+        save_baseline(name, result)
+        return
+    baseline = load_baseline().get(name)
+    assert baseline is not None, (
+        f'Для `{name}` нет базовой линии, запустите с BENCH_UPDATE_BASELINE=1'
+    )
+    assert result['queries'] <= baseline['queries'], (
+        f'`{name}`: {result["queries"]} SQL-запросов, '
+        f'базовая линия {baseline["queries"]}'
+    )
+    if not CHECK_TIMING:
+        return
+    assert result['ms'] <= baseline['ms'] * TOLERANCE, (
+        f'`{name}`: {result["ms"]} мс, базовая линия {baseline["ms"]} мс'
+    )
+    assert result['peak_kb'] <= baseline['peak_kb'] * TOLERANCE, (
+        f'`{name}`: пик памяти {result["peak_kb"]} КБ, '
+        f'базовая линия {baseline["peak_kb"]} КБ'
+    )
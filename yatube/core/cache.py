@@ -0,0 +1,263 @@
+"""Бэкенды кэша с учётом попаданий в метриках запроса.
+
+Какой из них используется, выбирают переменные окружения (см. CACHES
+в settings): LocMemCache живёт в памяти одного процесса, остальные
+общие для всех воркеров, поэтому сброс версии фрагментов доходит до
+каждого из них.
+"""
+import pickle
+import threading
+import zlib
+
+from django.core.cache.backends import filebased, locmem, memcached
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import record_cache
+from .resp import RespConnection, RespError, parse_location
+
+MISSING = object()
+
+# Значения длиннее этого (в байтах после pickle) сжимаются zlib.
+COMPRESS_MIN_LENGTH = 1024
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи кэша в метриках текущего запроса."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        record_cache(value is not MISSING)
+        return default if value is MISSING else value
+
+
+class Compressed:
+    """Сжатое значение, которое бэкенд хранит вместо исходного."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+class CompressionMixin:
+    """Сжимает большие значения перед отправкой на сервер кэша.
+
+    Порог задаёт параметр COMPRESS_MIN_LENGTH в описании кэша; 0
+    отключает сжатие.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.compress_min_length = params.get(
+            'COMPRESS_MIN_LENGTH', COMPRESS_MIN_LENGTH
+        )
+
+    def _compress(self, value):
+        if not self.compress_min_length:
+            return value
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) < self.compress_min_length:
+            return value
+        return Compressed(zlib.compress(data))
+
+    @staticmethod
+    def _decompress(value):
+        if isinstance(value, Compressed):
+            return pickle.loads(zlib.decompress(value.data))
+        return value
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        return default if value is MISSING else self._decompress(value)
+
+    def get_many(self, keys, version=None):
+        return {
+            key: self._decompress(value)
+            for key, value in super().get_many(keys, version).items()
+        }
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return super().add(key, self._compress(value), timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return super().set(key, self._compress(value), timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        data = {key: self._compress(value) for key, value in data.items()}
+        return super().set_many(data, timeout, version)
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(InstrumentedCacheMixin, filebased.FileBasedCache):
+    """Файлы в общем каталоге; значения Django и так сжимает zlib."""
+
+
+class MemcachedCache(InstrumentedCacheMixin, CompressionMixin,
+                     memcached.MemcachedCache):
+    """memcached через python-memcached (ставится отдельно)."""
+
+
+class RedisCache(InstrumentedCacheMixin, BaseCache):
+    """Кэш на Redis или совместимом сервере, без сторонних библиотек.
+
+    LOCATION — redis://host:port/db. Целые числа хранятся как есть,
+    чтобы incr выполнялся на сервере атомарно, остальное — pickle,
+    длинные значения дополнительно сжимаются zlib. clear() удаляет
+    только ключи с KEY_PREFIX этого кэша.
+    """
+
+    PICKLED = b'p'
+    COMPRESSED = b'z'
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        self.host, self.port, self.db = parse_location(server)
+        options = params.get('OPTIONS') or {}
+        self.socket_timeout = options.get('SOCKET_TIMEOUT', 5)
+        self.compress_min_length = params.get(
+            'COMPRESS_MIN_LENGTH', COMPRESS_MIN_LENGTH
+        )
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = RespConnection(
+                self.host, self.port, self.db, self.socket_timeout
+            )
+        return connection
+
+    def close(self, **kwargs):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+
+    def encode(self, value):
+        if type(value) is int:
+            return b'%d' % value
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self.compress_min_length and (
+                len(data) >= self.compress_min_length):
+            return self.COMPRESSED + zlib.compress(data)
+        return self.PICKLED + data
+
+    def decode(self, data):
+        marker, payload = data[:1], data[1:]
+        if marker == self.COMPRESSED:
+            return pickle.loads(zlib.decompress(payload))
+        if marker == self.PICKLED:
+            return pickle.loads(payload)
+        return int(data)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        return key
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        """Время жизни в миллисекундах для PX, None — бессрочно."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 1) if timeout > 0 else 0
+
+    def _set_command(self, key, value, timeout, *flags):
+        command = ['SET', key, self.encode(value), *flags]
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None:
+            command += ['PX', timeout]
+        return command
+
+    def _expired(self, timeout):
+        return self.get_backend_timeout(timeout) == 0
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._expired(timeout):
+            return not self.has_key(key, version)
+        key = self._key(key, version)
+        command = self._set_command(key, value, timeout, 'NX')
+        return self.connection.execute(*command) is not None
+
+    def get(self, key, default=None, version=None):
+        data = self.connection.execute('GET', self._key(key, version))
+        return default if data is None else self.decode(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._expired(timeout):
+            self.delete(key, version)
+            return
+        key = self._key(key, version)
+        self.connection.execute(*self._set_command(key, value, timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.connection.pipeline(
+                [('PERSIST', key), ('EXISTS', key)]
+            )[1] == 1
+        if timeout == 0:
+            return self.connection.execute('DEL', key) == 1
+        return self.connection.execute('PEXPIRE', key, timeout) == 1
+
+    def delete(self, key, version=None):
+        self.connection.execute('DEL', self._key(key, version))
+
+    def has_key(self, key, version=None):
+        return self.connection.execute(
+            'EXISTS', self._key(key, version)
+        ) == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self.connection.execute('EXISTS', key):
+            raise ValueError(f"Key '{key}' not found")
+        try:
+            return self.connection.execute('INCRBY', key, delta)
+        except RespError as error:
+            raise ValueError(str(error))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.connection.execute(
+            'MGET', *(self._key(key, version) for key in keys)
+        )
+        return {
+            key: self.decode(data)
+            for key, data in zip(keys, values) if data is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._expired(timeout):
+            self.delete_many(data, version)
+            return []
+        if data:
+            self.connection.pipeline([
+                self._set_command(self._key(key, version), value, timeout)
+                for key, value in data.items()
+            ])
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self.connection.execute('DEL', *keys)
+
+    def clear(self):
+        pattern = f'{self.key_prefix}*'.replace('[', '\\[')
+        cursor = b'0'
+        while True:
+            cursor, keys = self.connection.execute(
+                'SCAN', cursor, 'MATCH', pattern, 'COUNT', 1000
+            )
+            if keys:
+                self.connection.execute('DEL', *keys)
+            if cursor == b'0':
+                break
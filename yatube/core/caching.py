@@ -0,0 +1,94 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .replicas import reading_replica
+
+VERSION_KEY = 'cache_version:{}'
+BUMPED_AT_KEY = 'cache_version_at:{}'
+LOCK_TIMEOUT = 30
+
+
+def _initial_version():
+    # Версия от текущего времени: если ключ версии вытеснят из кэша,
+    # счёт не начнётся заново и старые фрагменты не оживут.
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Сделать недействительными все фрагменты пространства имён."""
+    key = VERSION_KEY.format(namespace)
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            BUMPED_AT_KEY.format(namespace), time.time(),
+            settings.REPLICA_STICKY_SECONDS,
+        )
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+        return cache.get(key)
+
+
+def fresh_timeout(namespace, timeout, replica):
+    """Таймаут для того, что отрисовано с реплики (replica=True).
+
+    В первые REPLICA_STICKY_SECONDS после сброса версии реплика может
+    ещё не видеть изменение, из-за которого версию сбросили; такая
+    запись живёт только до конца этого окна, а не весь timeout.
+    """
+    if not replica:
+        return timeout
+    bumped_at = cache.get(BUMPED_AT_KEY.format(namespace))
+    if bumped_at is None:
+        return timeout
+    remaining = math.ceil(
+        bumped_at + settings.REPLICA_STICKY_SECONDS - time.time()
+    )
+    if remaining <= 0:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def get_or_render(fragment_name, namespace, vary_on, timeout, render):
+    """Достать фрагмент из кэша или отрисовать его в одном воркере.
+
+    Ключ включает текущую версию пространства имён, поэтому сброс версии
+    мгновенно делает старые фрагменты недоступными. При промахе рисует
+    только воркер, взявший блокировку; остальные отдают последнюю
+    отрисованную копию, а если её нет — рисуют сами.
+    """
+    key = make_template_fragment_key(
+        fragment_name, [get_version(namespace), *vary_on]
+    )
+    value = cache.get(key)
+    if value is not None:
+        return value
+    stale_key = make_template_fragment_key(f'{fragment_name}.stale', vary_on)
+    lock_key = f'{key}.lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return stale
+        return render()
+    try:
+        value = render()
+        cache.set(key, value, fresh_timeout(
+            namespace, timeout, reading_replica()
+        ))
+        cache.set(stale_key, value, None if timeout is None else timeout * 2)
+    finally:
+        cache.delete(lock_key)
+    return value
@@ -0,0 +1,38 @@
+"""Настройка соединений SQLite под нагрузку.
+
+При каждом новом соединении выполняются PRAGMA из SQLITE_PRAGMAS: WAL
+позволяет читать, пока другой воркер пишет, synchronous=NORMAL в
+режиме WAL не теряет целостность, а mmap и cache_size уменьшают число
+чтений с диска. Вместе с CONN_MAX_AGE соединение и его кэш страниц
+живут дольше одного запроса.
+"""
+import re
+
+from django.conf import settings
+
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        if value is None or value == '':
+            continue
+        value = str(value)
+        if not PRAGMA_VALUE.match(value):
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(cursor, pragmas):
+    for statement in pragma_statements(pragmas):
+        cursor.execute(statement)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,287 @@
+"""Нагрузочный прогон приложения через yatube.wsgi.application.
+
+Приложение поднимается встроенным wsgiref-сервером в фоновом потоке,
+виртуальные пользователи в потоках шлют запросы по смеси действий:
+анонимное чтение главной и групп, лента подписок, комментарии и
+загрузка картинок. Для каждого имени URL считаются перцентили задержки
+и пропускная способность. Клиенты и сервер делят один процесс, так что
+цифры годятся для сравнения режимов и версий кода, а не для оценки
+абсолютной ёмкости.
+"""
+import http.client
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from io import BytesIO
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.urls import reverse
+from PIL import Image
+
+from .metrics import percentile
+
+ACTIONS = ('index', 'group', 'follow', 'comment', 'upload')
+LOGGED_IN = {'follow', 'comment', 'upload'}
+DEFAULT_MIX = 'index=50,group=20,follow=15,comment=10,upload=5'
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LoadWSGIServer(WSGIServer):
+    # Очередь подключений с запасом на всех виртуальных пользователей.
+    request_queue_size = 128
+
+
+class ThreadingWSGIServer(ThreadingMixIn, LoadWSGIServer):
+    daemon_threads = True
+
+
+# Режимы сервера. ASGI в Django 2.2 нет (django.core.asgi появился в
+# 3.0), поэтому сравниваются однопоточный и многопоточный WSGI.
+SERVERS = {
+    'wsgi': LoadWSGIServer,
+    'threaded': ThreadingWSGIServer,
+}
+
+
+def parse_mix(value):
+    """'index=50,group=20' → {'index': 50, 'group': 20}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS or not weight.strip().isdigit():
+            raise ValueError(f'Непонятная часть смеси: {part!r}')
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError('У всех действий нулевой вес')
+    return mix
+
+
+def sample_image():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; '
+            f'name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; '
+            f'name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+            + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Browser:
+    """HTTP-клиент с cookie одного виртуального пользователя."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.cookies = {}
+
+    def request(self, method, path, body=None, content_type=None):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        if body is not None:
+            headers['Content-Type'] = content_type
+            headers['X-CSRFToken'] = self.cookies.get(
+                settings.CSRF_COOKIE_NAME, ''
+            )
+        connection = http.client.HTTPConnection(self.host, self.port)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status
+
+    def post(self, path, fields, files=None):
+        if files:
+            body, content_type = multipart(fields, files)
+        else:
+            body = urlencode(fields).encode()
+            content_type = 'application/x-www-form-urlencoded'
+        return self.request('POST', path, body, content_type)
+
+    def login(self, username, password):
+        path = reverse('users:login')
+        self.request('GET', path)
+        status = self.post(path, {
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self.cookies.get(
+                settings.CSRF_COOKIE_NAME, ''
+            ),
+        })
+        if status != 302:
+            raise RuntimeError(f'Не удалось войти как {username}')
+
+
+class LoadRun:
+    """Один прогон смеси действий против одного режима сервера.
+
+    targets — словарь с group_slugs, post_ids и users (пары логин,
+    пароль) для действий; выбираются случайно, но воспроизводимо.
+    """
+
+    def __init__(self, mode, mix, targets, concurrency, seed=0):
+        self.mode = mode
+        self.mix = mix
+        self.targets = targets
+        self.concurrency = concurrency
+        self.seed = seed
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.image = sample_image()
+        self.elapsed = 0.0
+
+    def action_request(self, action, rng, anonymous, browser):
+        if action == 'index':
+            return 'posts:index', anonymous.request(
+                'GET', reverse('posts:index'))
+        if action == 'group':
+            slug = rng.choice(self.targets['group_slugs'])
+            return 'posts:group_list', anonymous.request('GET', reverse(
+                'posts:group_list', kwargs={'slug': slug}))
+        if action == 'follow':
+            return 'posts:follow_index', browser.request(
+                'GET', reverse('posts:follow_index'))
+        if action == 'comment':
+            post_id = rng.choice(self.targets['post_ids'])
+            return 'posts:add_comment', browser.post(
+                reverse('posts:add_comment', kwargs={'post_id': post_id}),
+                {'text': f'Комментарий {rng.random()}'},
+            )
+        return 'posts:post_create', browser.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой'},
+            {'image': ('load.png', self.image, 'image/png')},
+        )
+
+    def client(self, number, host, port, limit):
+        rng = random.Random(f'{self.seed}:{number}')
+        actions, weights = zip(*self.mix.items())
+        anonymous = Browser(host, port)
+        browser = None
+        try:
+            if LOGGED_IN & {name for name, weight in self.mix.items()
+                            if weight}:
+                browser = Browser(host, port)
+                users = self.targets['users']
+                browser.login(*users[number % len(users)])
+        except Exception:
+            self.ready.abort()
+            raise
+        # Входы в замер не попадают: отсчёт начинается, когда вошли все.
+        self.ready.wait()
+        samples, errors = defaultdict(list), defaultdict(int)
+        sent = 0
+        while (time.monotonic() < self.deadline if limit is None
+               else sent < limit):
+            sent += 1
+            action = rng.choices(actions, weights)[0]
+            started = time.perf_counter()
+            try:
+                name, status = self.action_request(
+                    action, rng, anonymous, browser
+                )
+            except (OSError, http.client.HTTPException):
+                name, status = action, None
+            samples[name].append(time.perf_counter() - started)
+            if status is None or status >= 400:
+                errors[name] += 1
+        with self.lock:
+            for name, values in samples.items():
+                self.samples[name].extend(values)
+            for name, count in errors.items():
+                self.errors[name] += count
+
+    def start_clock(self):
+        self.started = time.perf_counter()
+        self.deadline = time.monotonic() + self.seconds
+
+    def run(self, seconds=None, requests=None):
+        """Прогнать нагрузку seconds секунд или по requests запросов на
+        каждого клиента."""
+        from yatube.wsgi import application
+        server = make_server(
+            '127.0.0.1', 0, application,
+            server_class=SERVERS[self.mode], handler_class=QuietHandler,
+        )
+        host, port = server.server_address[:2]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.seconds = seconds or 0
+        self.ready = threading.Barrier(
+            self.concurrency + 1, action=self.start_clock
+        )
+        limit = None if seconds else requests
+        clients = [
+            threading.Thread(target=self.client, args=(number, host, port,
+                                                       limit))
+            for number in range(self.concurrency)
+        ]
+        try:
+            for client in clients:
+                client.start()
+            try:
+                self.ready.wait()
+            except threading.BrokenBarrierError:
+                raise RuntimeError('Виртуальные пользователи не вошли')
+            for client in clients:
+                client.join()
+            self.elapsed = time.perf_counter() - self.started
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        return self
+
+    def report(self):
+        """Строки (имя URL, запросов, ошибок, запросов/с, p50, p95,
+        p99 в мс), в конце — итог по всем URL."""
+        rows = []
+        everything = []
+        for name, values in sorted(self.samples.items()):
+            everything.extend(values)
+            rows.append(self._row(name, values, self.errors[name]))
+        if everything:
+            rows.append(self._row(
+                'total', everything, sum(self.errors.values())
+            ))
+        return rows
+
+    def _row(self, name, values, errors):
+        return (
+            name, len(values), errors,
+            len(values) / self.elapsed if self.elapsed else 0.0,
+            *(percentile(values, rank) * 1000 for rank in (50, 95, 99)),
+        )
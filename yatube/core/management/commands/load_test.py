@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import DEFAULT_MIX, LOGGED_IN, SERVERS, LoadRun, parse_mix
+from posts.models import Group, Post, User
+from posts.seeding import SEED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон через yatube.wsgi.application на встроенном '
+        'сервере: смесь чтений и записей, перцентили задержки и запросы '
+        'в секунду по именам URL для каждого режима сервера. Пишет в '
+        'текущую базу; вошедшие пользователи берутся из seed_yatube'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode', action='append', choices=[*SERVERS, 'asgi'],
+            help='Режим сервера, можно несколько; по умолчанию все WSGI',
+        )
+        parser.add_argument(
+            '--mix', default=DEFAULT_MIX,
+            help=f'Веса действий, по умолчанию {DEFAULT_MIX}',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--seconds', type=float, default=10,
+            help='Длительность прогона каждого режима',
+        )
+        parser.add_argument(
+            '--requests', type=int,
+            help='Вместо --seconds: сколько запросов шлёт каждый клиент',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        modes = options['mode'] or list(SERVERS)
+        if 'asgi' in modes:
+            raise CommandError(
+                'В Django 2.2 нет ASGI-обработчика (появился в 3.0); '
+                'доступные режимы: ' + ', '.join(SERVERS)
+            )
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as error:
+            raise CommandError(error)
+        targets = self.targets(mix, options['concurrency'])
+        totals = {}
+        for mode in modes:
+            run = LoadRun(
+                mode, mix, targets, options['concurrency'], options['seed']
+            ).run(
+                seconds=None if options['requests'] else options['seconds'],
+                requests=options['requests'],
+            )
+            self.stdout.write(f'\n{mode}: {run.elapsed:.1f} с')
+            self.stdout.write('\t'.join(
+                ('url', 'n', 'errors', 'rps', 'p50 ms', 'p95 ms', 'p99 ms')
+            ))
+            for name, count, errors, rps, *ranks in run.report():
+                self.stdout.write('\t'.join(
+                    [name, str(count), str(errors), f'{rps:.1f}']
+                    + [f'{value:.1f}' for value in ranks]
+                ))
+                if name == 'total':
+                    totals[mode] = rps
+        self.stdout.write(self.style.SUCCESS('\n' + ', '.join(
+            f'{mode}: {rps:.1f} запросов/с' for mode, rps in totals.items()
+        )))
+
+    def targets(self, mix, concurrency):
+        active = {name for name, weight in mix.items() if weight}
+        targets = {
+            'group_slugs': list(Group.objects.values_list(
+                'slug', flat=True)[:1000]),
+            'post_ids': list(Post.objects.values_list(
+                'pk', flat=True)[:1000]),
+            'users': [
+                (username, SEED_PASSWORD) for username in
+                User.objects.filter(username__startswith='seed_').order_by(
+                    'pk').values_list('username', flat=True)[:concurrency]
+            ],
+        }
+        if 'group' in active and not targets['group_slugs']:
+            raise CommandError('Нет групп: заполните базу seed_yatube')
+        if 'comment' in active and not targets['post_ids']:
+            raise CommandError('Нет постов: заполните базу seed_yatube')
+        if active & LOGGED_IN and not targets['users']:
+            raise CommandError(
+                'Нет пользователей seed_yatube, под которыми войти'
+            )
+        return targets
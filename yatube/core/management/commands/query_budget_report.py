@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.metrics import percentile, read_samples
+
+FIELDS = ('queries', 'db_ms', 'template_ms', 'total_ms')
+RANKS = (50, 95, 99)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка по журналу QueryBudgetMiddleware: перцентили запросов к БД, '
+        'времени БД, шаблонов и ответа по каждому URL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log', default=settings.QUERY_BUDGET_LOG,
+            help='Путь к журналу, по умолчанию QUERY_BUDGET_LOG',
+        )
+
+    def handle(self, *args, **options):
+        if not options['log']:
+            raise CommandError(
+                'Журнал не задан: укажите --log или QUERY_BUDGET_LOG'
+            )
+        samples = defaultdict(list)
+        try:
+            for sample in read_samples(options['log']):
+                samples[sample['view']].append(sample)
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {options["log"]} не найден')
+        header = ['view', 'n'] + [
+            f'{field} p{rank}' for field in FIELDS for rank in RANKS
+        ] + ['cache hit %']
+        self.stdout.write('\t'.join(header))
+        for view, view_samples in sorted(samples.items()):
+            row = [view, str(len(view_samples))]
+            for field in FIELDS:
+                values = [sample[field] for sample in view_samples]
+                row += [f'{percentile(values, rank):g}' for rank in RANKS]
+            hits = sum(sample['cache_hits'] for sample in view_samples)
+            lookups = hits + sum(
+                sample['cache_misses'] for sample in view_samples
+            )
+            row.append(f'{100 * hits / lookups:.0f}' if lookups else '-')
+            self.stdout.write('\t'.join(row))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.resp_server import StandInServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Запустить встроенный Redis-совместимый сервер кэша для локальной '
+        'разработки (YATUBE_CACHE_BACKEND=redis)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = StandInServer(options['host'], options['port'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сервер кэша слушает {server.location}'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,140 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE author (id INTEGER PRIMARY KEY, username TEXT NOT NULL);
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    author_id INTEGER NOT NULL REFERENCES author (id)
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+'''
+READ_SQL = (
+    'SELECT post.id, post.text, author.username FROM post '
+    'JOIN author ON author.id = post.author_id '
+    'ORDER BY post.pub_date DESC LIMIT 10 OFFSET ?'
+)
+WRITE_SQL = 'INSERT INTO post (text, pub_date, author_id) VALUES (?, ?, ?)'
+AUTHORS = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер SQLite: читатели ленты и писатели постов в '
+        'потоках на временной базе, без PRAGMA и с новым соединением на '
+        'каждый запрос против SQLITE_PRAGMAS и постоянных соединений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument(
+            '--write-share', type=float, default=0.2,
+            help='Доля операций записи',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=5000,
+            help='Сколько постов в базе перед замером',
+        )
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('default', {}, False),
+            ('tuned', settings.SQLITE_PRAGMAS, True),
+        )
+        self.stdout.write('profile\treads/s\twrites/s\tlocked')
+        results = {}
+        for name, pragmas, persistent in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'load.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                reads, writes, locked = self.run_load(
+                    path, pragmas, persistent, options
+                )
+            seconds = options['seconds']
+            results[name] = (reads + writes) / seconds
+            self.stdout.write(
+                f'{name}\t{reads / seconds:.0f}\t{writes / seconds:.0f}'
+                f'\t{locked}'
+            )
+        if results['default']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Прирост пропускной способности: '
+                f'{results["tuned"] / results["default"]:.2f}x'
+            ))
+
+    def connect(self, path, pragmas):
+        connection = sqlite3.connect(path, timeout=5)
+        apply_pragmas(connection, pragmas)
+        return connection
+
+    def prepare(self, path, pragmas, rows):
+        connection = self.connect(path, pragmas)
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                'INSERT INTO author (id, username) VALUES (?, ?)',
+                [(pk, f'author{pk}') for pk in range(1, AUTHORS + 1)],
+            )
+            now = time.time()
+            connection.executemany(WRITE_SQL, [
+                (f'Пост {number}', now - number, number % AUTHORS + 1)
+                for number in range(rows)
+            ])
+        connection.close()
+
+    def run_load(self, path, pragmas, persistent, options):
+        deadline = time.monotonic() + options['seconds']
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            done = {'reads': 0, 'writes': 0, 'locked': 0}
+            connection = self.connect(path, pragmas) if persistent else None
+            while time.monotonic() < deadline:
+                current = connection or self.connect(path, pragmas)
+                try:
+                    if rng.random() < options['write_share']:
+                        with current:
+                            current.execute(WRITE_SQL, (
+                                'Новый пост', time.time(),
+                                rng.randint(1, AUTHORS),
+                            ))
+                        done['writes'] += 1
+                    else:
+                        current.execute(
+                            READ_SQL, (rng.randrange(0, 100) * 10,)
+                        ).fetchall()
+                        done['reads'] += 1
+                except sqlite3.OperationalError:
+                    done['locked'] += 1
+                finally:
+                    if connection is None:
+                        current.close()
+            if connection is not None:
+                connection.close()
+            with lock:
+                for key, value in done.items():
+                    counts[key] += value
+
+        threads = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts['reads'], counts['writes'], counts['locked']
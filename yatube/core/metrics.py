@@ -0,0 +1,83 @@
+import json
+import math
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны и обращения к кэшу."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_time = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'template_ms': round(self.template_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'total_ms': round(self.total_time * 1000, 3),
+        }
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_template(seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_time += seconds
+
+
+def record_cache(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def write_sample(view_name, metrics):
+    """Дописать замер в QUERY_BUDGET_LOG одной JSON-строкой."""
+    sample = dict(metrics.as_dict(), view=view_name)
+    with open(settings.QUERY_BUDGET_LOG, 'a') as log:
+        log.write(json.dumps(sample) + '\n')
+
+
+def read_samples(path):
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(values, rank):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
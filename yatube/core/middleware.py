@@ -0,0 +1,156 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import parse_http_date_safe
+
+from . import metrics
+from .caching import fresh_timeout, get_version
+
+HEADERS = (
+    ('X-Query-Count', 'queries'),
+    ('X-DB-Time-Ms', 'db_ms'),
+    ('X-Template-Time-Ms', 'template_ms'),
+    ('X-Cache-Hits', 'cache_hits'),
+    ('X-Cache-Misses', 'cache_misses'),
+    ('X-Total-Time-Ms', 'total_ms'),
+)
+
+
+class QueryBudgetMiddleware:
+    """Замеряет SQL, шаблоны и кэш для каждого запроса.
+
+    В DEBUG отдаёт замеры в заголовках ответа, при заданном
+    QUERY_BUDGET_LOG пишет их в журнал для query_budget_report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        request_metrics.db_wrapper
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        request_metrics.total_time = time.perf_counter() - started
+        match = request.resolver_match
+        if match is None:
+            return response
+        if settings.DEBUG:
+            values = request_metrics.as_dict()
+            for header, field in HEADERS:
+                response[header] = values[field]
+        if settings.QUERY_BUDGET_LOG:
+            metrics.write_sample(match.view_name, request_metrics)
+        return response
+
+
+PAGE_CACHE_KEY = 'page_cache:{}'
+PAGE_CACHE_PARAMS = ('page', 'cursor', 'sort')
+# Заголовки, которые при попадании в кэш выставляются заново под
+# запрос; остальные, включая X-Frame-Options от XFrameOptionsMiddleware,
+# повторяются из сохранённого ответа.
+PAGE_CACHE_SKIP_HEADERS = {'cache-control', 'vary', 'set-cookie'}
+
+
+class PageCacheMiddleware:
+    """Кэш целых страниц из PAGE_CACHE_VIEWS.
+
+    Стоит после SecurityMiddleware, но до сессий, аутентификации и
+    CSRF, поэтому попадание в кэш обходится без них и без
+    контекст-процессоров, а заголовки безопасности получает, как и
+    обычный ответ. Страницы этих
+    представлений рисуются без данных пользователя: шапка, вкладки и
+    CSRF-токен подставляются скриптом из core:user_fragments
+    (request.page_cache в шаблонах), поэтому одна копия годится и
+    анонимам, и вошедшим. Ключ — путь, ?page, ?cursor, ?sort и версия
+    пространства имён кэша, указанная для представления; запросы
+    с другими параметрами не кэшируются. Сохраняются только ответы
+    на запросы без сессии, чтобы в кэш не попало ничего личного.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key, namespace = self.cache_key(request)
+        if key is None:
+            return self.get_response(request)
+        request.page_cache = True
+        cached = cache.get(key)
+        if cached is not None:
+            return self.cached_response(request, *cached)
+        response = self.get_response(request)
+        if (response.status_code == 200 and not response.streaming
+                and not response.cookies and not self.has_session(request)):
+            headers = {
+                header: value for header, value in response.items()
+                if header.lower() not in PAGE_CACHE_SKIP_HEADERS
+            }
+            cache.set(key, (response.content, headers), fresh_timeout(
+                namespace, settings.PAGE_CACHE_TIMEOUT,
+                getattr(request, 'replica_reads', False),
+            ))
+        return response
+
+    @staticmethod
+    def has_session(request):
+        return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+    def cache_key(self, request):
+        """Ключ страницы и пространство имён или (None, None)."""
+        if not settings.PAGE_CACHE_ENABLED or request.method != 'GET':
+            return None, None
+        if any(param not in PAGE_CACHE_PARAMS for param in request.GET):
+            return None, None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None, None
+        namespace = settings.PAGE_CACHE_VIEWS.get(match.view_name)
+        if namespace is None:
+            return None, None
+        # Попадание в кэш не доходит до разбора URL в Django, а по
+        # resolver_match QueryBudgetMiddleware пишет замер в журнал.
+        request.resolver_match = match
+        raw = '|'.join([
+            str(get_version(namespace)), request.path,
+            *(request.GET.get(param, '') for param in PAGE_CACHE_PARAMS),
+        ])
+        key = PAGE_CACHE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+        return key, namespace
+
+    def cached_response(self, request, content, headers):
+        response = HttpResponse(content)
+        for header, value in headers.items():
+            response[header] = value
+        response['X-Page-Cache'] = 'hit'
+        if self.has_session(request):
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.HTML_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(
+                headers.get('Last-Modified', '')
+            ),
+            response=response,
+        )
@@ -0,0 +1,87 @@
+"""Чтение лент с реплик базы данных.
+
+Представления, обёрнутые replica_reads, читают с одной из реплик из
+DATABASE_REPLICAS, всё остальное и любые записи идут в default. После
+записи (sticks_to_primary) пользователь получает cookie и следующие
+REPLICA_STICKY_SECONDS секунд читает только с default, чтобы после
+редиректа увидеть свой пост или комментарий, даже если реплика отстаёт.
+Остальные могут прочитать с реплики старые данные уже после сброса
+версии кэша, поэтому такие отрисовки кэшируются только до конца этого
+окна (core.caching.fresh_timeout).
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_COOKIE = 'read_primary'
+
+# Сессии и пользователи пишутся при регистрации и входе и нужны сразу:
+# иначе только что вошедший выглядел бы анонимом, пока реплика отстаёт.
+PRIMARY_ONLY_APPS = {'sessions', 'auth'}
+
+# Реплика, выбранная для текущего запроса, или None.
+_replica_reads = ContextVar('replica_reads', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = _replica_reads.get()
+        if replica and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Явно, иначе Django пишет объект туда, откуда его прочитал.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно связывать.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def reading_replica():
+    """Читает ли текущее представление с реплик."""
+    return _replica_reads.get() is not None
+
+
+def replica_reads(view):
+    """Читать с реплики, если пользователь недавно ничего не записывал.
+
+    Реплика выбирается одна на запрос, чтобы счётчики и строки страницы
+    были из одного снимка. request.replica_reads сообщает о ней
+    middleware, которые работают уже после выхода из представления.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if PRIMARY_COOKIE in request.COOKIES or not replicas:
+            return view(request, *args, **kwargs)
+        request.replica_reads = True
+        token = _replica_reads.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+def sticks_to_primary(view):
+    """После записи с редиректом читать с default ещё какое-то время."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if settings.DATABASE_REPLICAS and response.status_code in (301, 302):
+            response.set_cookie(
+                PRIMARY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+    return wrapper
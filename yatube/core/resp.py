@@ -0,0 +1,113 @@
+"""Минимальный клиент протокола RESP (Redis и совместимые серверы).
+
+Нужен только бэкенду кэша core.cache.RedisCache, поэтому умеет ровно
+то, что тому требуется: команды по одной и пачкой (pipeline).
+"""
+import socket
+from urllib.parse import urlsplit
+
+DEFAULT_PORT = 6379
+
+
+class RespError(Exception):
+    """Сервер ответил ошибкой (-ERR ...)."""
+
+
+def parse_location(location):
+    """Разобрать redis://host:port/db или host:port в (host, port, db)."""
+    if '://' not in location:
+        location = f'redis://{location}'
+    parts = urlsplit(location)
+    db = parts.path.strip('/')
+    return (
+        parts.hostname or 'localhost',
+        parts.port or DEFAULT_PORT,
+        int(db) if db else 0,
+    )
+
+
+def encode_command(*args):
+    chunks = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = b'%d' % arg
+        chunks.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(chunks)
+
+
+class RespConnection:
+    def __init__(self, host, port, db=0, timeout=None):
+        self.host, self.port, self.db = host, port, db
+        self.timeout = timeout
+        self.sock = None
+        self.file = None
+
+    def connect(self):
+        self.sock = socket.create_connection(
+            (self.host, self.port), self.timeout
+        )
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile('rb')
+        if self.db:
+            self._send([('SELECT', self.db)])
+            self._read()
+
+    def close(self):
+        if self.sock is not None:
+            self.file.close()
+            self.sock.close()
+        self.sock = self.file = None
+
+    def _send(self, commands):
+        self.sock.sendall(b''.join(
+            encode_command(*command) for command in commands
+        ))
+
+    def _read(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError('Сервер закрыл соединение')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return RespError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length == -1:
+                return None
+            return self.file.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(rest)
+            if length == -1:
+                return None
+            return [self._read() for _ in range(length)]
+        raise ConnectionError(f'Непонятный ответ сервера: {line!r}')
+
+    def pipeline(self, commands):
+        """Отправить команды одним пакетом и прочитать все ответы.
+
+        При обрыве соединения переподключается один раз.
+        """
+        for attempt in (1, 2):
+            try:
+                if self.sock is None:
+                    self.connect()
+                self._send(commands)
+                replies = [self._read() for _ in commands]
+                break
+            except (ConnectionError, OSError):
+                self.close()
+                if attempt == 2:
+                    raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
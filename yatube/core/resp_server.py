@@ -0,0 +1,180 @@
+"""Встроенный сервер, совместимый с Redis по протоколу RESP.
+
+Хранит данные в памяти процесса и понимает только команды, которые
+использует core.cache.RedisCache. Нужен тестам и локальной разработке
+(команда run_cache_server), когда настоящего Redis под рукой нет.
+"""
+import fnmatch
+import socketserver
+import threading
+import time
+
+from .resp import RespError, encode_command
+
+
+def encode_reply(reply):
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, RespError):
+        return b'-%s\r\n' % str(reply).encode()
+    if isinstance(reply, bool):
+        return b'+OK\r\n' if reply else b'$-1\r\n'
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, list):
+        return b'*%d\r\n%s' % (
+            len(reply), b''.join(encode_reply(item) for item in reply)
+        )
+    return encode_command(reply)[4:]
+
+
+class Store:
+    """Ключи с временем истечения; все операции под одной блокировкой."""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, name, *args):
+        handler = getattr(self, f'cmd_{name.decode().lower()}', None)
+        if handler is None:
+            return RespError(f'ERR unknown command {name.decode()!r}')
+        with self.lock:
+            try:
+                return handler(*args)
+            except (TypeError, ValueError):
+                return RespError(f'ERR wrong arguments for {name.decode()!r}')
+
+    def cmd_ping(self):
+        return 'PONG'
+
+    def cmd_select(self, db):
+        return True
+
+    def cmd_get(self, key):
+        item = self._alive(key)
+        return item and item[0]
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *flags):
+        flags = [flag.upper() for flag in flags]
+        expires = None
+        if b'PX' in flags:
+            milliseconds = int(flags[flags.index(b'PX') + 1])
+            expires = time.monotonic() + milliseconds / 1000
+        if b'NX' in flags and self._alive(key):
+            return False
+        self.data[key] = (value, expires)
+        return True
+
+    def cmd_del(self, *keys):
+        return sum(
+            self._alive(key) is not None and bool(self.data.pop(key))
+            for key in keys
+        )
+
+    def cmd_exists(self, *keys):
+        return sum(self._alive(key) is not None for key in keys)
+
+    def cmd_incrby(self, key, delta):
+        item = self._alive(key)
+        value, expires = item or (b'0', None)
+        try:
+            value = int(value) + int(delta)
+        except ValueError:
+            return RespError('ERR value is not an integer or out of range')
+        self.data[key] = (b'%d' % value, expires)
+        return value
+
+    def cmd_pexpire(self, key, milliseconds):
+        item = self._alive(key)
+        if item is None:
+            return 0
+        expires = time.monotonic() + int(milliseconds) / 1000
+        self.data[key] = (item[0], expires)
+        return 1
+
+    def cmd_persist(self, key):
+        item = self._alive(key)
+        if item is None or item[1] is None:
+            return 0
+        self.data[key] = (item[0], None)
+        return 1
+
+    def cmd_scan(self, cursor, *options):
+        pattern = b'*'
+        if b'MATCH' in options:
+            pattern = options[options.index(b'MATCH') + 1]
+        keys = [
+            key for key in list(self.data)
+            if self._alive(key) and fnmatch.fnmatchcase(
+                key.decode(), pattern.decode()
+            )
+        ]
+        return [b'0', keys]
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return True
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                break
+            if command:
+                reply = self.server.store.execute(*command)
+                self.wfile.write(encode_reply(reply))
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """Сервер в фоновом потоке; port=0 — любой свободный порт."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), RespHandler)
+        self.store = Store()
+        self.thread = None
+
+    @property
+    def location(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
@@ -0,0 +1,32 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .metrics import record_template
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record_template(time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, замеряющий время отрисовки шаблонов запроса."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
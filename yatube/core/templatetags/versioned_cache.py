@@ -0,0 +1,60 @@
+from django import template
+
+from core.caching import get_or_render
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, namespace, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.namespace = namespace
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        if timeout is not None:
+            try:
+                timeout = int(timeout)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    f'"versioned_cache" tag got a non-integer timeout '
+                    f'value: {timeout!r}'
+                )
+        return get_or_render(
+            self.fragment_name,
+            self.namespace.resolve(context),
+            [var.resolve(context) for var in self.vary_on],
+            timeout,
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag('versioned_cache')
+def do_versioned_cache(parser, token):
+    """
+    Кэширует фрагмент шаблона с учётом версии пространства имён.
+
+    Использование::
+
+        {% load versioned_cache %}
+        {% versioned_cache [timeout] [fragment_name] [namespace] [var ...] %}
+            .. some expensive processing ..
+        {% endversioned_cache %}
+    """
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 4:
+        raise template.TemplateSyntaxError(
+            f'"{tokens[0]}" tag requires at least 3 arguments.'
+        )
+    return VersionedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        parser.compile_filter(tokens[3]),
+        [parser.compile_filter(token) for token in tokens[4:]],
+    )
@@ -1,4 +1,31 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+from .cache import RedisCache
+from .caching import bump_version, get_or_render, get_version
+from .replicas import PRIMARY_COOKIE, ReplicaRouter, replica_reads
+from .resp_server import StandInServer
+from .workers import process_pool
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -7,3 +34,437 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
         self.assertEqual(response.status_code, 404)
+
+
+class VersionedCacheTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_bump_version_invalidates_fragment(self):
+        """Проверка смена версии сбрасывает закэшированный фрагмент."""
+        template = Template(
+            '{% load versioned_cache %}'
+            "{% versioned_cache 60 test_fragment 'test' %}"
+            '{{ value }}{% endversioned_cache %}'
+        )
+        self.assertEqual(template.render(Context({'value': 1})), '1')
+        self.assertEqual(template.render(Context({'value': 2})), '1')
+        bump_version('test')
+        self.assertEqual(template.render(Context({'value': 3})), '3')
+
+    def test_concurrent_miss_serves_stale_copy(self):
+        """Проверка пока фрагмент рисует другой воркер, отдаётся копия."""
+        get_or_render('test_fragment', 'test', [], 60, lambda: 'old')
+        bump_version('test')
+        key = make_template_fragment_key(
+            'test_fragment', [get_version('test')]
+        )
+        cache.add(f'{key}.lock', 1)
+        self.assertEqual(
+            get_or_render('test_fragment', 'test', [], 60, lambda: 'new'),
+            'old'
+        )
+        cache.delete(f'{key}.lock')
+        self.assertEqual(
+            get_or_render('test_fragment', 'test', [], 60, lambda: 'new'),
+            'new'
+        )
+
+
+class QueryBudgetTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(DEBUG=True)
+    def test_debug_headers(self):
+        """Проверка в DEBUG замеры запроса отдаются в заголовках."""
+        response = self.client.get('/')
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        for header in ('X-DB-Time-Ms', 'X-Template-Time-Ms',
+                       'X-Cache-Hits', 'X-Cache-Misses', 'X-Total-Time-Ms'):
+            with self.subTest(header=header):
+                self.assertTrue(response.has_header(header))
+
+    def test_no_headers_without_debug(self):
+        """Проверка без DEBUG заголовки с замерами не отдаются."""
+        response = self.client.get('/')
+        self.assertFalse(response.has_header('X-Query-Count'))
+
+    def test_report_percentiles_from_log(self):
+        """Проверка отчёт группирует замеры из журнала по URL."""
+        with tempfile.TemporaryDirectory() as directory:
+            log = os.path.join(directory, 'budget.log')
+            with self.settings(QUERY_BUDGET_LOG=log):
+                for _ in range(3):
+                    self.client.get('/')
+                self.client.get('/about/author/')
+                out = StringIO()
+                call_command('query_budget_report', stdout=out)
+        rows = dict(
+            line.split('\t', 2)[:2] for line in out.getvalue().splitlines()
+        )
+        self.assertEqual(rows['posts:index'], '3')
+        self.assertEqual(rows['about:author'], '1')
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_anonymous_hit_skips_database(self):
+        """Проверка повторный анонимный запрос отдаётся из кэша."""
+        first = self.client.get('/')
+        self.assertFalse(first.has_header('X-Page-Cache'))
+        with self.assertNumQueries(0):
+            second = self.client.get('/')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('public', second['Cache-Control'])
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_hit_keeps_response_headers(self):
+        """Проверка попадание в кэш отдаёт те же заголовки, что промах."""
+        miss = self.client.get('/')
+        hit = self.client.get('/')
+        self.assertEqual(hit['X-Page-Cache'], 'hit')
+        self.assertTrue(hit.has_header('X-Frame-Options'))
+        for header, value in miss.items():
+            with self.subTest(header=header):
+                self.assertEqual(hit[header], value)
+
+    def test_hit_logged_under_view_name(self):
+        """Проверка попадания в кэш попадают в журнал замеров."""
+        with tempfile.TemporaryDirectory() as directory:
+            log = os.path.join(directory, 'budget.log')
+            with self.settings(QUERY_BUDGET_LOG=log):
+                for _ in range(3):
+                    self.client.get('/')
+                out = StringIO()
+                call_command('query_budget_report', stdout=out)
+        rows = dict(
+            line.split('\t', 2)[:2] for line in out.getvalue().splitlines()
+        )
+        self.assertEqual(rows['posts:index'], '3')
+
+    def test_anonymous_fragments_without_csrf_cookie(self):
+        """Проверка аноним получает CSRF-токен только для формы."""
+        url = '/fragments/user/?view=posts:index'
+        response = self.client.get(url)
+        self.assertNotIn('csrf_token', response.json())
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        response = self.client.get(url + '&csrf=1')
+        self.assertTrue(response.json()['csrf_token'])
+
+    def test_cached_page_has_no_user_data(self):
+        """Проверка страница в кэше одна для всех, личное — во фрагменте."""
+        self.client.force_login(self.user)
+        response = self.client.get('/')
+        self.assertNotContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'data-hole="header"')
+        self.assertFalse(self.client.get('/').has_header('X-Page-Cache'))
+        Client().get('/')
+        response = self.client.get('/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertIn('private', response['Cache-Control'])
+        fragments = self.client.get('/fragments/user/?view=posts:index')
+        data = fragments.json()
+        self.assertIn('Пользователь: reader', data['header'])
+        self.assertIn('Избранные авторы', data['switcher'])
+        self.assertTrue(data['csrf_token'])
+        self.assertIn('no-store', fragments['Cache-Control'])
+
+    def test_new_post_invalidates_page(self):
+        """Проверка новый пост сбрасывает кэш страниц ленты."""
+        self.client.get('/')
+        Post.objects.create(text='Свежий пост', author=self.user)
+        response = self.client.get('/')
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_other_params_bypass_cache(self):
+        """Проверка запросы с посторонними параметрами не кэшируются."""
+        self.client.get('/?utm=1')
+        self.assertFalse(self.client.get('/?utm=1').has_header('X-Page-Cache'))
+        self.client.get('/?page=1')
+        self.assertEqual(self.client.get('/?page=1')['X-Page-Cache'], 'hit')
+
+
+class RedisCacheTests(TestCase):
+    """Бэкенд RedisCache против встроенного сервера в этом процессе."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StandInServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.store.data.clear()
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        self.cache.close()
+
+    def make_cache(self, **params):
+        params.setdefault('KEY_PREFIX', 'yatube')
+        return RedisCache(self.server.location, params)
+
+    def test_values_round_trip(self):
+        """Проверка значения переживают запись и чтение, ключи получают
+        префикс и версию."""
+        values = {'text': 'пост', 'number': 7, 'list': [1, None], 'flag': True}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(list(values) + ['x']), values)
+        self.assertIn(b'yatube:1:text', self.server.store.data)
+        self.assertIsNone(self.make_cache(VERSION=2).get('text'))
+        self.assertIsNone(self.make_cache(KEY_PREFIX='other').get('text'))
+        self.assertFalse(self.cache.add('text', 'другой'))
+        self.cache.delete_many(['text', 'number'])
+        self.assertEqual(self.cache.get('text', 'нет'), 'нет')
+        self.assertTrue(self.cache.has_key('list'))
+
+    def test_timeouts(self):
+        """Проверка истечение срока жизни и touch."""
+        self.cache.set('short', 1, 0.05)
+        self.cache.set('gone', 1, 0)
+        self.cache.set('forever', 1, None)
+        self.assertFalse(self.cache.has_key('gone'))
+        self.assertTrue(self.cache.touch('forever', 0.05))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertIsNone(self.cache.get('forever'))
+
+    def test_large_values_compressed(self):
+        """Проверка большие значения хранятся сжатыми."""
+        text = 'Тестовый пост. ' * 1000
+        self.cache.set('page', text)
+        stored = self.server.store.data[b'yatube:1:page'][0]
+        self.assertLess(len(stored), len(text) // 10)
+        self.assertEqual(self.cache.get('page'), text)
+        self.make_cache(COMPRESS_MIN_LENGTH=0).set('raw', text)
+        stored = self.server.store.data[b'yatube:1:raw'][0]
+        self.assertGreater(len(stored), len(text))
+
+    def test_incr_shared_between_workers(self):
+        """Проверка сброс версии из одного воркера виден другому, incr
+        атомарен."""
+        other = self.make_cache()
+        self.assertTrue(self.cache.add('cache_version:feed', 1, None))
+        workers = [
+            threading.Thread(target=lambda: [
+                other.incr('cache_version:feed') for _ in range(50)
+            ])
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('cache_version:feed'), 201)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        with self.assertRaises(ValueError):
+            self.cache.set('text', 'пост') or self.cache.incr('text')
+
+    def test_clear_keeps_other_prefixes(self):
+        """Проверка clear удаляет только ключи своего префикса."""
+        other = self.make_cache(KEY_PREFIX='other')
+        self.cache.set('key', 1)
+        other.set('key', 2)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(other.get('key'), 2)
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        """Проверка новое соединение получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+    def test_load_benchmark(self):
+        """Проверка нагрузочный замер сравнивает оба профиля."""
+        out = StringIO()
+        call_command(
+            'sqlite_load_benchmark', threads=2, seconds=0.2, rows=50,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split('\t')[0] for line in lines[1:3]],
+            ['default', 'tuned'],
+        )
+        self.assertIn('Прирост', lines[3])
+
+
+class ProcessPoolTests(TestCase):
+    def test_connections_closed_before_start(self):
+        """Проверка соединения закрываются до запуска процессов."""
+        with mock.patch.object(
+                connections, 'close_all',
+                wraps=connections.close_all) as close_all:
+            with process_pool(2) as pool:
+                close_all.assert_called_once_with()
+                self.assertEqual(list(pool.map(abs, [-1, -2])), [1, 2])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """Реплика — второе соединение к той же тестовой базе."""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases['replica'] = {
+            **connections.databases['default'],
+            'TEST': {'MIRROR': 'default'},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(text='Тестовый пост', author=self.user)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = self.client.get(url)
+        return response, [query['sql'] for query in primary], replica
+
+    def test_feeds_read_from_replica(self):
+        """Проверка посты лент и страницы поста читаются с реплики."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': 'reader'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('api_v1:index'),
+        ):
+            with self.subTest(url=url):
+                response, primary, replica = self.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(len(replica))
+                self.assertFalse([
+                    sql for sql in primary if 'FROM "posts_post"' in sql
+                ])
+
+    def test_user_read_from_primary(self):
+        """Проверка пользователь запроса читается с default, даже если
+        впервые нужен внутри представления на реплике."""
+        response, primary, replica = self.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue([sql for sql in primary if 'FROM "auth_user"' in sql])
+        self.assertFalse([
+            query['sql'] for query in replica
+            if query['sql'].lstrip().startswith('SELECT "auth_user"')
+        ])
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'other'])
+    def test_one_replica_per_request(self):
+        """Проверка все чтения одного запроса идут в одну реплику."""
+        router = ReplicaRouter()
+
+        @replica_reads
+        def view(request):
+            return {router.db_for_read(Post) for _ in range(50)}
+
+        chosen = view(RequestFactory().get('/'))
+        self.assertEqual(len(chosen), 1)
+        self.assertLessEqual(chosen, {'replica', 'other'})
+
+    @override_settings(PAGE_CACHE_ENABLED=True, REPLICA_STICKY_SECONDS=1)
+    def test_replica_render_after_bump_is_cached_briefly(self):
+        """Проверка отрисованное с реплики сразу после сброса версии
+        живёт в кэше не дольше окна отставания реплики."""
+        anonymous = Client()
+        Post.objects.create(text='Свежий пост', author=self.user)
+        anonymous.get(reverse('posts:index'))
+        self.assertEqual(
+            anonymous.get(reverse('posts:index'))['X-Page-Cache'], 'hit'
+        )
+        time.sleep(1.1)
+        response = anonymous.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertEqual(
+            anonymous.get(reverse('posts:index'))['X-Page-Cache'], 'hit'
+        )
+
+    def test_write_sticks_to_primary(self):
+        """Проверка после записи пользователь читает с default."""
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response, primary, replica = self.get(url)
+        self.assertContains(response, 'Комментарий')
+        self.assertEqual(len(replica), 0)
+        self.client.cookies.pop(PRIMARY_COOKIE)
+        self.assertTrue(len(self.get(url)[2]))
+
+
+class LoadTestTests(TransactionTestCase):
+    """Сервер нагрузочного прогона работает в своём потоке со своим
+    соединением, поэтому данные должны быть закоммичены."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        call_command(
+            'seed_yatube', users=3, groups=2, posts=20, comments=5,
+            follows_per_user=1, workers=1, stdout=StringIO(),
+        )
+
+    def tearDown(self):
+        self.media.cleanup()
+        cache.clear()
+
+    def test_report_per_url_name(self):
+        """Проверка прогон смеси действий и отчёт по именам URL."""
+        out = StringIO()
+        with override_settings(MEDIA_ROOT=self.media.name):
+            call_command(
+                'load_test', mode=['wsgi'], concurrency=1, requests=15,
+                mix='index=1,group=1,follow=1,comment=1,upload=1',
+                stdout=out,
+            )
+        rows = {
+            line.split('\t')[0]: line.split('\t')
+            for line in out.getvalue().splitlines() if '\t' in line
+        }
+        self.assertEqual(rows['total'][1:3], ['15', '0'])
+        self.assertIn('posts:index', rows)
+        self.assertEqual(Post.objects.count() - 20, int(
+            rows.get('posts:post_create', ['', '0'])[1]
+        ))
+
+    def test_asgi_mode_unavailable(self):
+        """Проверка режим ASGI отклоняется с объяснением."""
+        with self.assertRaisesMessage(CommandError, 'ASGI'):
+            call_command('load_test', mode=['asgi'], stdout=StringIO())
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('fragments/user/', views.user_fragments, name='user_fragments'),
+]
@@ -1,4 +1,8 @@
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
 
 
 def page_not_found(request, exception):
@@ -8,3 +12,28 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@never_cache
+def user_fragments(request):
+    """Личные части страниц из кэша целых страниц: меню, вкладки, CSRF.
+
+    CSRF-токен (а с ним и cookie csrftoken) выдаётся только вошедшим или
+    странице с формой (?csrf=1): иначе каждый аноним получал бы cookie,
+    а с Vary: Cookie общие кэши перестали бы делить страницы анонимов.
+    """
+    context = {
+        'view_name': request.GET.get('view', ''),
+        'nav_user': request.user,
+    }
+    data = {
+        'header': render_to_string(
+            'includes/header_nav.html', context, request
+        ),
+        'switcher': render_to_string(
+            'posts/includes/switcher_tabs.html', context, request
+        ),
+    }
+    if request.user.is_authenticated or request.GET.get('csrf'):
+        data['csrf_token'] = get_token(request)
+    return JsonResponse(data)
@@ -0,0 +1,16 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django import db
+
+
+@contextmanager
+def process_pool(workers):
+    """ProcessPoolExecutor для management-команд.
+
+    Соединения с базой закрываются до запуска процессов: дочерние
+    процессы не должны делить соединение родителя, каждый откроет своё.
+    """
+    db.connections.close_all()
+    with ProcessPoolExecutor(workers) as pool:
+        yield pool
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post, Group, Follow, Comment
+from .models import Post, Group, Follow, Comment, Counter, FollowSuggestion
+from .search import filter_posts
 
 
 @admin.register(Post)
@@ -11,12 +12,18 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'author',
         'group',
+        'comment_count',
     )
     list_editable = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_posts(queryset, search_term), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -48,3 +55,15 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('user',)
     search_fields = ('author',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'key', 'value')
+    search_fields = ('key',)
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author', 'score')
+    empty_value_display = '-пусто-'
@@ -0,0 +1,144 @@
+"""JSON-версия лент для мобильных клиентов.
+
+Ленты строятся теми же пагинаторами из feeds.py, что и HTML-страницы,
+а ETag — тем же ConditionalFeed. Если клиент прислал совпадающий
+If-None-Match (для поста — и If-Modified-Since), ответ — 304 без
+выборки страницы.
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_cookie
+
+from core.caching import get_version
+from core.replicas import replica_reads
+
+from .conditional import (ConditionalFeed, make_etag, memoize,
+                          post_last_modified, post_state)
+from .feeds import (comments_feed, comments_visible, feed_sort, follow_feed,
+                    group_feed, index_feed, profile_feed)
+from .follows import followed_ids
+from .models import Group, Post, User
+from .signals import FEED_CACHE_NAMESPACE
+from .thumbnails import attach_thumbnails
+
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder,
+        json_dumps_params=JSON_PARAMS,
+    )
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_response({'detail': 'Нужна авторизация'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def serialize_post(post):
+    image = None
+    if post.image:
+        image = (post.thumbnail or post.image).url
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': image,
+        'comment_count': post.comment_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'pub_date': comment.pub_date,
+    }
+
+
+def serialize_page(page_obj, serialize):
+    return {
+        'results': [serialize(item) for item in page_obj.object_list],
+        'next': page_obj.next_cursor,
+        'previous': page_obj.previous_cursor,
+    }
+
+
+def feed_view(build, state=None):
+    """Собрать JSON-представление ленты с условным GET."""
+    feed = ConditionalFeed(build, state)
+
+    @replica_reads
+    @require_GET
+    @feed.condition
+    def view(request, **kwargs):
+        page_obj = feed.page(request, **kwargs)
+        return api_response(serialize_page(page_obj, serialize_post))
+    return view
+
+
+def _follow_state(request):
+    return request.user.pk, sorted(followed_ids(request.user))
+
+
+index = feed_view(lambda request: index_feed(feed_sort(request)))
+group_list = feed_view(
+    lambda request, slug: group_feed(get_object_or_404(Group, slug=slug))
+)
+profile = feed_view(
+    lambda request, username: profile_feed(
+        get_object_or_404(User, username=username)
+    )
+)
+follow_index = api_login_required(vary_on_cookie(feed_view(
+    lambda request: follow_feed(request.user), state=_follow_state
+)))
+
+
+def _post(request, post_id):
+    return memoize(request, 'post', lambda: get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    ))
+
+
+def _post_last_modified(request, post_id):
+    return post_last_modified(_post(request, post_id))
+
+
+def _post_etag(request, post_id):
+    post = _post(request, post_id)
+    return make_etag(
+        get_version(FEED_CACHE_NAMESPACE),
+        *post_state(post),
+        request.get_full_path(),
+        comments_visible(request, post),
+    )
+
+
+@replica_reads
+@require_GET
+@vary_on_cookie
+@condition(etag_func=_post_etag, last_modified_func=_post_last_modified)
+def post_detail(request, post_id):
+    """Пост; комментарии — только автору, как на HTML-странице."""
+    post = _post(request, post_id)
+    attach_thumbnails([post])
+    data = serialize_post(post)
+    if comments_visible(request, post):
+        comments = comments_feed(post.pk).get_cursor_page(
+            request.GET.get('cursor')
+        )
+        data['comments'] = serialize_page(comments, serialize_comment)
+    return api_response(data)
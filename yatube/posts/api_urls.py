@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api_v1'
+
+urlpatterns = [
+    path('posts/', api.index, name='index'),
+    path('group/<slug:slug>/', api.group_list, name='group_list'),
+    path('profile/<str:username>/', api.profile, name='profile'),
+    path('posts/<int:post_id>/', api.post_detail, name='post_detail'),
+    path('follow/', api.follow_index, name='follow_index'),
+]
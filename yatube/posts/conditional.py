@@ -0,0 +1,131 @@
+"""Условный GET для лент и страниц постов.
+
+ETag собирается из дешёвых признаков изменения: версии кэша лент
+(её сбрасывают сигналы при любой правке постов, групп и комментариев),
+даты самого свежего поста ленты и того, кто смотрит страницу.
+Всё, что уже прочитано для заголовков, запоминается на запросе, чтобы
+представление не повторяло тех же запросов.
+
+Last-Modified есть только у страниц постов. Ленте его не из чего
+честно собрать: правка, удаление поста или новый комментарий меняют
+страницу, не делая её самый свежий пост новее, и клиент с одним
+If-Modified-Since получил бы 304 со старым содержимым.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.caching import get_version
+
+from .feeds import get_page
+from .signals import FEED_CACHE_NAMESPACE
+from .thumbnails import attach_thumbnails
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def memoize(request, name, compute):
+    """Посчитать значение один раз за запрос."""
+    attr = f'_conditional_{name}'
+    if not hasattr(request, attr):
+        setattr(request, attr, compute())
+    return getattr(request, attr)
+
+
+def viewer(request):
+    """Кто смотрит страницу: от этого зависят шапка и формы."""
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    return request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+
+
+def post_state(post):
+    """Поля поста, от которых зависит его страница."""
+    return post.pk, post.updated, post.comment_count, post.last_comment_at
+
+
+def post_last_modified(post):
+    return max(filter(None, (post.updated, post.last_comment_at)))
+
+
+class ConditionalFeed:
+    """ETag ленты по версии кэша лент и дате самого свежего поста.
+
+    build(request, **kwargs) возвращает пагинатор ленты, state(request,
+    **kwargs) — что ещё, кроме постов, меняет страницу.
+    """
+
+    def __init__(self, build, state=None):
+        self.build = build
+        self.state = state
+
+    def paginator(self, request, **kwargs):
+        return memoize(
+            request, 'paginator', lambda: self.build(request, **kwargs)
+        )
+
+    def _page(self, request, **kwargs):
+        return memoize(request, 'page', lambda: get_page(
+            self.paginator(request, **kwargs), request
+        ))
+
+    def page(self, request, **kwargs):
+        """Страница ленты с миниатюрами; выбирается один раз за запрос."""
+        page_obj = self._page(request, **kwargs)
+        attach_thumbnails(page_obj.object_list)
+        return page_obj
+
+    def newest(self, request, **kwargs):
+        def newest():
+            feed = self.paginator(request, **kwargs)
+            if 'page' not in request.GET and 'cursor' not in request.GET:
+                # Первая страница всё равно понадобится при отрисовке,
+                # а самый свежий пост ленты — её первый пост.
+                items = self._page(request, **kwargs).object_list
+                if not items:
+                    return None
+                return getattr(items[0], feed.date_field)
+            return feed.object_list.values_list(
+                feed.date_field, flat=True).first()
+        return memoize(request, 'newest', newest)
+
+    def etag(self, request, **kwargs):
+        return make_etag(
+            get_version(FEED_CACHE_NAMESPACE),
+            self.newest(request, **kwargs),
+            request.get_full_path(),
+            self.state(request, **kwargs) if self.state else '',
+        )
+
+    @property
+    def condition(self):
+        return condition(etag_func=self.etag)
+
+
+def http_cache_policy(view):
+    """Заголовки кэширования HTML-страниц.
+
+    Анонимам — public на HTML_CACHE_MAX_AGE секунд, чтобы их мог
+    отдавать обратный прокси; вошедшим — private с обязательной
+    перепроверкой по ETag. Ответы с cookie и ошибками тоже private.
+    Ответ в любом случае зависит от Cookie.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if (request.user.is_authenticated or response.cookies
+                or response.status_code not in (200, 304)):
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.HTML_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
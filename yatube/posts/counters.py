@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Counter, Post
+
+POSTS_PREFIX = 'posts:'
+ALL_POSTS_KEY = 'posts:all'
+
+
+def author_posts_key(author_id):
+    return f'posts:author:{author_id}'
+
+
+def group_posts_key(group_id):
+    return f'posts:group:{group_id}'
+
+
+def get_count(key, queryset):
+    """Прочитать счётчик, при первом обращении посчитав его по queryset."""
+    value = Counter.objects.filter(key=key).values_list(
+        'value', flat=True).first()
+    if value is None:
+        value = queryset.count()
+        Counter.objects.get_or_create(key=key, defaults={'value': value})
+    return value
+
+
+def get_counts(counters):
+    """Прочитать несколько счётчиков одним запросом.
+
+    counters — пары (ключ, queryset); отсутствующие счётчики считаются
+    и создаются как в get_count.
+    """
+    counters = dict(counters)
+    values = dict(Counter.objects.filter(key__in=counters).values_list(
+        'key', 'value'))
+    for key, queryset in counters.items():
+        if key not in values:
+            values[key] = get_count(key, queryset)
+    return values
+
+
+def change_count(key, queryset, delta):
+    updated = Counter.objects.filter(key=key).update(
+        value=F('value') + delta)
+    if not updated:
+        Counter.objects.get_or_create(
+            key=key, defaults={'value': queryset.count()})
+
+
+def post_count(author_id=None, group_id=None):
+    if author_id is not None:
+        return get_count(
+            author_posts_key(author_id),
+            Post.objects.filter(author_id=author_id)
+        )
+    if group_id is not None:
+        return get_count(
+            group_posts_key(group_id),
+            Post.objects.filter(group_id=group_id)
+        )
+    return get_count(ALL_POSTS_KEY, Post.objects.all())
+
+
+def post_counters(post):
+    """Пары (ключ, queryset) всех счётчиков, которые затрагивает пост."""
+    counters = [
+        (ALL_POSTS_KEY, Post.objects.all()),
+        (author_posts_key(post.author_id),
+         Post.objects.filter(author_id=post.author_id)),
+    ]
+    if post.group_id is not None:
+        counters.append((
+            group_posts_key(post.group_id),
+            Post.objects.filter(group_id=post.group_id)
+        ))
+    return counters
+
+
+def posts_added(posts):
+    """Учесть в счётчиках пачку новых постов: по запросу на счётчик."""
+    deltas, querysets = defaultdict(int), {}
+    for post in posts:
+        for key, queryset in post_counters(post):
+            deltas[key] += 1
+            querysets[key] = queryset
+    for key, delta in deltas.items():
+        change_count(key, querysets[key], delta)
+
+
+def reconcile_counts(prefix, actual):
+    """Привести счётчики с префиксом к значениям actual.
+
+    Лишние счётчики удаляются, недостающие создаются; возвращается число
+    исправленных.
+    """
+    with transaction.atomic():
+        stored = dict(Counter.objects.select_for_update().filter(
+            key__startswith=prefix).values_list('key', 'value'))
+        stale = [key for key in stored if key not in actual]
+        Counter.objects.filter(key__in=stale).delete()
+        fixed = len(stale)
+        for key, value in actual.items():
+            if key not in stored:
+                Counter.objects.create(key=key, value=value)
+            elif stored[key] != value:
+                Counter.objects.filter(key=key).update(value=value)
+            else:
+                continue
+            fixed += 1
+    return fixed
+
+
+def reconcile_post_counts():
+    """Пересчитать все счётчики постов, вернуть число исправленных."""
+    actual = {ALL_POSTS_KEY: Post.objects.count()}
+    for author_id, value in Post.objects.values_list('author').annotate(
+            value=Count('pk')).order_by():
+        actual[author_posts_key(author_id)] = value
+    for group_id, value in Post.objects.filter(
+            group__isnull=False).values_list('group').annotate(
+            value=Count('pk')).order_by():
+        actual[group_posts_key(group_id)] = value
+    return reconcile_counts(POSTS_PREFIX, actual)
+
+
+def _post_comments():
+    return Comment.objects.filter(post=OuterRef('pk')).order_by()
+
+
+def _last_comment_at():
+    return Subquery(_post_comments().order_by(
+        '-pub_date').values('pub_date')[:1])
+
+
+def comment_added(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=comment.pub_date,
+    )
+
+
+def comment_deleted(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_comment_at=_last_comment_at(),
+    )
+
+
+def reconcile_comment_counts():
+    """Пересчитать comment_count и last_comment_at всех постов одним
+    UPDATE, вернуть число обновлённых постов."""
+    counts = _post_comments().values('post').annotate(
+        value=Count('pk')).values('value')
+    return Post.objects.update(
+        comment_count=Coalesce(Subquery(counts), 0),
+        last_comment_at=_last_comment_at(),
+    )
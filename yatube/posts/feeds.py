@@ -0,0 +1,83 @@
+from django.conf import settings
+
+from .counters import post_count
+from .models import Comment, Post
+from .paginator import CursorPaginator
+from .thumbnails import attach_thumbnails
+from .timelines import follow_feed_paginator
+
+
+# ?sort=activity: лента по последнему комментарию вместо даты поста.
+ACTIVITY_SORT = 'activity'
+
+
+def feed_sort(request):
+    return ACTIVITY_SORT if request.GET.get('sort') == ACTIVITY_SORT else ''
+
+
+def index_feed(sort=''):
+    if sort == ACTIVITY_SORT:
+        return activity_feed()
+    return CursorPaginator(
+        Post.objects.select_related('author', 'group'),
+        settings.QUANTITY_POSTS,
+        counter=post_count,
+    )
+
+
+def activity_feed():
+    """Обсуждаемые посты: свежий комментарий выше; посты без
+    комментариев сюда не попадают."""
+    return CursorPaginator(
+        Post.objects.filter(last_comment_at__isnull=False).select_related(
+            'author', 'group'),
+        settings.QUANTITY_POSTS,
+        key_fields=('last_comment_at', 'pk'),
+    )
+
+
+def group_feed(group):
+    return CursorPaginator(
+        group.posts.select_related('author'),
+        settings.QUANTITY_POSTS,
+        counter=lambda: post_count(group_id=group.pk),
+    )
+
+
+def profile_feed(author):
+    return CursorPaginator(
+        author.posts.select_related('group'),
+        settings.QUANTITY_POSTS,
+        counter=lambda: post_count(author_id=author.pk),
+    )
+
+
+def follow_feed(user):
+    return follow_feed_paginator(user, settings.QUANTITY_POSTS)
+
+
+def comments_feed(post_id):
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.QUANTITY_COMMENTS,
+    )
+
+
+def comments_visible(request, post):
+    """Комментарии к посту видит только его автор
+    (см. posts/post_detail.html)."""
+    return request.user.is_authenticated and request.user.pk == post.author_id
+
+
+def get_page(paginator, request):
+    """Страница ленты по ?page=N или ?cursor=..."""
+    if 'page' in request.GET:
+        return paginator.get_page(request.GET.get('page'))
+    return paginator.get_cursor_page(request.GET.get('cursor'))
+
+
+def paginate(paginator, request):
+    """Страница ленты с миниатюрами постов."""
+    page_obj = get_page(paginator, request)
+    attach_thumbnails(page_obj.object_list)
+    return page_obj
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .counters import change_count, get_count, get_counts, reconcile_counts
+from .models import Follow
+
+FOLLOWS_PREFIX = 'follows:'
+
+
+def followers_key(user_id):
+    return f'follows:followers:{user_id}'
+
+
+def following_key(user_id):
+    return f'follows:following:{user_id}'
+
+
+def followed_ids_cache_key(user_id):
+    return f'follows:ids:{user_id}'
+
+
+def follower_count(user_id):
+    return get_count(
+        followers_key(user_id), Follow.objects.filter(author_id=user_id)
+    )
+
+
+def following_count(user_id):
+    return get_count(
+        following_key(user_id), Follow.objects.filter(user_id=user_id)
+    )
+
+
+def follow_counts(user_id):
+    """Число подписчиков и подписок пользователя одним запросом."""
+    values = get_counts([
+        (followers_key(user_id), Follow.objects.filter(author_id=user_id)),
+        (following_key(user_id), Follow.objects.filter(user_id=user_id)),
+    ])
+    return values[followers_key(user_id)], values[following_key(user_id)]
+
+
+def follow_counters(follow):
+    """Пары (ключ, queryset) счётчиков, которые затрагивает подписка."""
+    return [
+        (followers_key(follow.author_id),
+         Follow.objects.filter(author_id=follow.author_id)),
+        (following_key(follow.user_id),
+         Follow.objects.filter(user_id=follow.user_id)),
+    ]
+
+
+def follow_changed(follow, delta):
+    for key, queryset in follow_counters(follow):
+        change_count(key, queryset, delta)
+    cache.delete(followed_ids_cache_key(follow.user_id))
+
+
+def followed_ids(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Хранится в кэше до первой подписки или отписки пользователя.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    return cache.get_or_set(
+        followed_ids_cache_key(user.pk),
+        lambda: frozenset(Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True)),
+        settings.FOLLOWED_IDS_TIMEOUT,
+    )
+
+
+def reconcile_follow_counts():
+    """Пересчитать счётчики подписчиков и подписок."""
+    actual = {}
+    for author_id, value in Follow.objects.values_list('author').annotate(
+            value=Count('pk')).order_by():
+        actual[followers_key(author_id)] = value
+    for user_id, value in Follow.objects.values_list('user').annotate(
+            value=Count('pk')).order_by():
+        actual[following_key(user_id)] = value
+    return reconcile_counts(FOLLOWS_PREFIX, actual)
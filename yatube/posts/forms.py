@@ -1,6 +1,10 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
 
+from .images import normalize_image
 from .models import Post, Comment
+from .thumbnails import schedule_thumbnail
 
 
 class PostForm(forms.ModelForm):
@@ -16,6 +20,26 @@ class PostForm(forms.ModelForm):
                 'name': 'group', 'class': 'form-control', 'id': 'id_group'}),
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            # ImageField проверяет только заголовок, битый или слишком
+            # большой файл обнаруживается при декодировании.
+            try:
+                return normalize_image(image)
+            except (OSError, Image.DecompressionBombError):
+                raise forms.ValidationError(
+                    'Не удалось прочитать картинку: файл повреждён '
+                    'или слишком велик.'
+                )
+        return image
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and post.image and 'image' in self.changed_data:
+            schedule_thumbnail(post.image.name)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
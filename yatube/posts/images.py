@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image, ImageOps, features
+
+# Кодеки Pillow, без которых формат сохранить нельзя.
+FORMAT_FEATURES = {'WEBP': 'webp', 'AVIF': 'avif'}
+RGB_ONLY_FORMATS = ('JPEG',)
+EXTENSIONS = {'JPEG': '.jpg', 'TIFF': '.tif'}
+
+
+def output_format(source_format):
+    """Формат хранения: настроенный, если Pillow умеет в него писать."""
+    target = settings.POST_IMAGE_FORMAT.upper()
+    feature = FORMAT_FEATURES.get(target)
+    if feature is None or features.check(feature):
+        return target
+    return source_format
+
+
+def normalize_image(upload):
+    """Пережать загруженную картинку для хранения.
+
+    Картинка уменьшается до POST_IMAGE_MAX_SIZE по большей стороне,
+    теряет EXIF и прочие метаданные и сохраняется в POST_IMAGE_FORMAT.
+    Результат пишется во временный файл, который держится в памяти
+    только до FILE_UPLOAD_MAX_MEMORY_SIZE. Анимации не трогаем.
+    """
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    upload.seek(0)
+    with Image.open(upload) as image:
+        if getattr(image, 'is_animated', False):
+            upload.seek(0)
+            return upload
+        source_format = image.format
+        # Для JPEG декодируем сразу в уменьшенном масштабе.
+        image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size))
+    image_format = output_format(source_format)
+    if image_format in RGB_ONLY_FORMATS and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    image.save(output, image_format, quality=settings.POST_IMAGE_QUALITY)
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    extension = EXTENSIONS.get(image_format, f'.{image_format.lower()}')
+    return File(output, name=f'{name}{extension}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.timelines import backfill_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает по лентам подписчиков посты авторов, опустившихся '
+        'ниже TIMELINE_FANOUT_LIMIT'
+    )
+
+    def handle(self, *args, **options):
+        authors = backfill_pending()
+        self.stdout.write(self.style.SUCCESS(
+            f'Разложены посты авторов: {authors}'
+        ))
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.workers import process_pool
+from posts.suggestions import (clear_suggestions_after, compute_suggestions,
+                               store_suggestions, user_ranges)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает подсказки «кого почитать» по таблице Follow '
+        'пачками пользователей в нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов, по умолчанию по числу ядер',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей считать одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        ranges = list(user_ranges(options['batch_size']))
+        if options['workers'] <= 1:
+            results = map(compute_suggestions, ranges)
+            stored = self.store(results)
+        else:
+            with process_pool(options['workers']) as pool:
+                stored = self.store(pool.map(compute_suggestions, ranges))
+        clear_suggestions_after(ranges[-1][1] if ranges else -1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пачек: {len(ranges)}, подсказок: {stored}'
+        ))
+
+    def store(self, results):
+        # Процессы только читают, а пишет один родитель: у SQLite
+        # одновременно может быть лишь один писатель.
+        return sum(store_suggestions(*result) for result in results)
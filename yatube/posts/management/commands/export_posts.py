@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в NDJSON или CSV, читая базу порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл для выгрузки, по умолчанию stdout',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        rows = export_rows(options['chunk_size'])
+        if options['output'] == '-':
+            write_rows(rows, sys.stdout, options['format'])
+            return
+        with open(options['output'], 'w', newline='',
+                  encoding='utf-8') as stream:
+            written = write_rows(rows, stream, options['format'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено постов: {written}'
+        ))
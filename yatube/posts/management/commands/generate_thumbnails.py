@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.workers import process_pool
+from posts.models import Post
+from posts.thumbnails import pregenerate_thumbnail
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие миниатюры для картинок постов '
+        'параллельно на всех ядрах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов, по умолчанию по числу ядер',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50,
+            help='Сколько картинок отдавать процессу за раз',
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by('pk').values_list(
+            'image', flat=True).iterator()
+        if options['workers'] <= 1:
+            results = list(map(pregenerate_thumbnail, names))
+        else:
+            names = list(names)
+            with process_pool(options['workers']) as pool:
+                results = list(pool.map(
+                    pregenerate_thumbnail, names,
+                    chunksize=options['chunk_size'],
+                ))
+        failed = results.count(False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {len(results)}, ошибок: {failed}'
+        ))
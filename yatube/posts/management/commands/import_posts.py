@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from posts.transfer import FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из NDJSON или CSV пачками bulk_create; авторы и '
+        'группы ищутся по username и slug'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', help='Файл с постами, - для stdin',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='По умолчанию по расширению файла, иначе ndjson',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов вставлять одной пачкой',
+        )
+        parser.add_argument(
+            '--keep-ids', action='store_true',
+            help='Сохранить id постов из файла',
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or (
+            'csv' if options['input'].endswith('.csv') else 'ndjson'
+        )
+        if options['input'] == '-':
+            created, skipped = self.load(sys.stdin, fmt, options)
+        else:
+            try:
+                with open(options['input'], newline='',
+                          encoding='utf-8') as stream:
+                    created, skipped = self.load(stream, fmt, options)
+            except FileNotFoundError:
+                raise CommandError(f'Файл {options["input"]} не найден')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {created}, пропущено: {skipped}'
+        ))
+
+    def load(self, stream, fmt, options):
+        try:
+            return import_rows(
+                read_rows(stream, fmt), options['batch_size'],
+                keep_ids=options['keep_ids'],
+            )
+        except (DatabaseError, ValueError) as error:
+            raise CommandError(
+                f'Загрузка прервана, уже загруженное сохранено: {error}'
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.timelines import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок по таблице Follow'
+
+    def handle(self, *args, **options):
+        entries = rebuild_timelines()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {entries}'
+        ))
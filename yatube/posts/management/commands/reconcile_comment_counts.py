@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает comment_count и last_comment_at у всех постов'
+
+    def handle(self, *args, **options):
+        updated = reconcile_comment_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано постов: {updated}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.follows import reconcile_follow_counts
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики подписчиков и подписок с таблицей Follow'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_follow_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_post_counts
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики постов с таблицей Post и исправляет расхождения'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_post_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}'
+        ))
@@ -0,0 +1,82 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.workers import process_pool
+from posts.counters import reconcile_comment_counts
+from posts.follows import reconcile_follow_counts
+from posts.models import Comment, Group, Post
+from posts.seeding import (KINDS, generate, make_plan, seed_password, store,
+                           tasks)
+from posts.transfer import keep_pub_date, refresh_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу большим детерминированным набором пользователей, '
+        'групп, постов, комментариев и подписок для нагрузочных замеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=20,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов-генераторов, по умолчанию по числу ядер',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк вставлять одним bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 and (
+                options['posts'] or options['follows_per_user']):
+            raise CommandError('Для постов и подписок нужно от 2 авторов')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Комментариям нужны посты')
+        plan = make_plan(
+            options['seed'], options['users'], options['groups'],
+            options['posts'], options['comments'],
+            options['follows_per_user'],
+        )
+        all_tasks = [task for kind in KINDS for task in tasks(plan, kind)]
+        password = seed_password()
+        stored = dict.fromkeys(KINDS, 0)
+        with keep_pub_date(Post, Comment, Group):
+            if options['workers'] <= 1:
+                chunks = map(generate, all_tasks)
+                self.store(chunks, stored, options['batch_size'], password)
+            else:
+                with process_pool(options['workers']) as pool:
+                    self.store(
+                        self.generate(pool, all_tasks, options['workers']),
+                        stored, options['batch_size'], password,
+                    )
+        refresh_derived_data()
+        reconcile_comment_counts()
+        reconcile_follow_counts()
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{kind}: {count}' for kind, count in stored.items()
+        )))
+
+    def generate(self, pool, all_tasks, workers):
+        # Не больше двух порций на процесс впереди записи, чтобы память
+        # не росла, если вставка медленнее генерации.
+        window = workers * 2
+        for start in range(0, len(all_tasks), window):
+            yield from pool.map(generate, all_tasks[start:start + window])
+
+    def store(self, chunks, stored, batch_size, password):
+        # Процессы только генерируют строки, а пишет один родитель по
+        # порядку порций: у SQLite одновременно может быть лишь один
+        # писатель, а порядок вставки сохраняет ссылки между таблицами.
+        for kind, rows in chunks:
+            stored[kind] += store(kind, rows, batch_size, password)
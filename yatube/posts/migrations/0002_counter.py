@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Например posts:all или posts:author:1', max_length=64, unique=True, verbose_name='Ключ счётчика')),
+                ('value', models.IntegerField(default=0, verbose_name='Значение')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, help_text='Меняется при каждом сохранении поста', verbose_name='Дата изменения'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при добавлении и удалении комментария', verbose_name='Число комментариев'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Дата последнего комментария к посту', null=True, verbose_name='Последний комментарий'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_comment_at', '-id'], name='post_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_post_activity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineBackfill',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+                ('author', models.OneToOneField(help_text='Автор, чьи посты ещё не разложены по лентам подписчиков', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+        ),
+    ]
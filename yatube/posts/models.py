@@ -32,6 +32,11 @@ class Post(models.Model):
         help_text="Укажите текст поста"
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Меняется при каждом сохранении поста'
+    )
     group = models.ForeignKey(
         Group,
         on_delete=models.SET_NULL,
@@ -53,9 +58,40 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+        help_text='Обновляется при добавлении и удалении комментария'
+    )
+    last_comment_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Последний комментарий',
+        help_text='Дата последнего комментария к посту'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-last_comment_at', '-id'),
+                name='post_activity_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:self.CONSTANT_STR]
@@ -84,6 +120,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('post', '-pub_date', '-id'),
+                name='comment_post_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:self.CONSTANT_STR]
@@ -116,3 +158,125 @@ class Follow(models.Model):
                 name='author_and_user_are_not_the_same'
             )
         ]
+
+
+class Counter(models.Model):
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Ключ счётчика',
+        help_text='Например posts:all или posts:author:1',
+    )
+    value = models.IntegerField(
+        default=0,
+        verbose_name='Значение',
+    )
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Владелец ленты',
+        help_text='Подписчик, в ленту которого попал пост',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+        help_text='Пост в ленте подписок',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+        help_text='Автор поста, нужен для чистки ленты при отписке',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации поста',
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='timeline_user_and_post_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class TimelineBackfill(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+        help_text='Автор, чьи посты ещё не разложены по лентам подписчиков',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь',
+    )
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+        help_text='Кому предлагается подписка',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+        help_text='На кого предлагается подписаться',
+    )
+    score = models.PositiveIntegerField(
+        verbose_name='Общих подписок',
+        help_text='Сколько авторов из подписок пользователя подписаны '
+                  'на этого автора',
+    )
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='suggestion_user_and_author_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-score'),
+                name='suggestion_user_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.author_id} ({self.score})'
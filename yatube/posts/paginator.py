@@ -0,0 +1,125 @@
+import base64
+import binascii
+from datetime import timezone
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+# id в курсоре должен поместиться в знаковое 64-битное INTEGER базы.
+MAX_PK = 2 ** 63 - 1
+
+
+def encode_cursor(direction, pub_date, pk):
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Вернуть (направление, pub_date, pk) или None для битого курсора."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, pub_date, pk = raw.decode().split('|')
+        pub_date, pk = parse_datetime(pub_date), int(pk)
+        if pub_date is not None and pub_date.tzinfo is not None:
+            # Дата, которую нельзя перевести в UTC, уронила бы запрос.
+            pub_date = pub_date.astimezone(timezone.utc)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        return None
+    if (direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None
+            or not -MAX_PK - 1 <= pk <= MAX_PK):
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по паре (pub_date, id).
+
+    Страница по курсору читается одним запросом LIMIT per_page + 1 без
+    COUNT(*) и OFFSET, поэтому глубина листания не влияет на скорость.
+    Нумерованные страницы (?page=N) поддерживаются для старых ссылок.
+    Если передан counter, общее число объектов берётся из него, а не из
+    COUNT(*) по выборке. key_fields задаёт поля даты и id, по которым
+    идёт выборка, transform — как превратить строки выборки в объекты
+    страницы (например, записи ленты в посты).
+    """
+
+    def __init__(self, object_list, per_page, counter=None,
+                 key_fields=('pub_date', 'pk'), transform=list, **kwargs):
+        self.date_field, self.pk_field = key_fields
+        super().__init__(
+            object_list.order_by(f'-{self.date_field}', f'-{self.pk_field}'),
+            per_page, **kwargs
+        )
+        self.counter = counter
+        self.transform = transform
+
+    @cached_property
+    def count(self):
+        if self.counter is not None:
+            return self.counter()
+        return super().count
+
+    def _cursor(self, direction, item):
+        return encode_cursor(
+            direction,
+            getattr(item, self.date_field),
+            getattr(item, self.pk_field),
+        )
+
+    def _beyond(self, pub_date, pk, lookup):
+        date_field, pk_field = self.date_field, self.pk_field
+        return (
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{pk_field}__{lookup}': pk})
+        )
+
+    def _fill_page(self, page, items, cursor, has_previous, has_next):
+        page.cursor = cursor
+        page.previous_cursor = (
+            self._cursor(CURSOR_PREVIOUS, items[0])
+            if items and has_previous else None
+        )
+        page.next_cursor = (
+            self._cursor(CURSOR_NEXT, items[-1])
+            if items and has_next else None
+        )
+        page.object_list = self.transform(items)
+        return page
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        return self._fill_page(
+            page, list(page.object_list), None,
+            page.has_previous(), page.has_next()
+        )
+
+    def get_cursor_page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        limit = self.per_page + 1
+        if decoded is None:
+            cursor = None
+            items = list(self.object_list[:limit])
+            has_next, has_previous = len(items) > self.per_page, False
+            items = items[:self.per_page]
+        else:
+            direction, pub_date, pk = decoded
+            if direction == CURSOR_NEXT:
+                items = list(self.object_list.filter(
+                    self._beyond(pub_date, pk, 'lt')
+                )[:limit])
+                has_next, has_previous = len(items) > self.per_page, True
+                items = items[:self.per_page]
+            else:
+                items = list(self.object_list.filter(
+                    self._beyond(pub_date, pk, 'gt')
+                ).order_by(self.date_field, self.pk_field)[:limit])
+                has_next, has_previous = True, len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+        page = self._get_page(items, 1 if cursor is None else None, self)
+        return self._fill_page(page, items, cursor, has_previous, has_next)
@@ -0,0 +1,161 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+# Таблица FTS5 создаётся миграцией 0007_post_search.
+SEARCH_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+
+
+def is_available():
+    """Полнотекстовый индекс есть только в SQLite (FTS5)."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Превратить ввод пользователя в выражение MATCH.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 из запроса не
+    ломали синтаксис; слова объединяются через AND, последнее ищется
+    по префиксу.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def index_posts(posts):
+    """Проиндексировать пачку постов двумя запросами."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(post.pk,) for post in posts],
+        )
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, text) VALUES (%s, %s)',
+            [(post.pk, post.text) for post in posts],
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+
+def rebuild_search_index():
+    """Заполнить индекс заново из таблицы Post, вернуть число постов."""
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_posts(queryset, query):
+    """Оставить в queryset посты, подходящие под запрос (без ранжирования).
+
+    Используется в админке; без FTS5 падает обратно на icontains.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return queryset.none()
+    if not is_available():
+        return queryset.filter(text__icontains=query)
+    # RawSQL в pk__in оборачивается в лишние скобки, и SQLite читает
+    # подзапрос как скалярный, поэтому условие добавляется через extra().
+    return queryset.extra(
+        where=[
+            f'{Post._meta.db_table}.id IN (SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s)'
+        ],
+        params=[expression],
+    )
+
+
+class SearchResults:
+    """Результаты поиска, упорядоченные по BM25, для Paginator.
+
+    Число совпадений и каждая страница идентификаторов читаются из
+    индекса отдельным запросом, посты страницы — одним запросом по id.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.query = query
+        self.expression = match_expression(query)
+        self.queryset = (
+            Post.objects.select_related('author', 'group')
+            if queryset is None else queryset
+        )
+
+    def _fetch(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self.expression is None:
+            return 0
+        if not is_available():
+            return self.queryset.filter(text__icontains=self.query).count()
+        return self._fetch(
+            f'SELECT count(*) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            [self.expression],
+        )[0][0]
+
+    def _ids(self, offset, limit):
+        if not is_available():
+            return list(self.queryset.filter(
+                text__icontains=self.query).values_list(
+                'pk', flat=True)[offset:offset + limit])
+        return [pk for pk, in self._fetch(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'ORDER BY bm25({SEARCH_TABLE}) LIMIT %s OFFSET %s',
+            [self.expression, limit, offset],
+        )]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if self.expression is None:
+            return []
+        offset = index.start or 0
+        ids = self._ids(offset, index.stop - offset)
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
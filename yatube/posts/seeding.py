@@ -0,0 +1,213 @@
+"""Большие наборы данных для нагрузочных замеров.
+
+Результат определяется только зерном и объёмами: каждая порция строк
+генерируется своим random.Random, id задаются явно от текущего
+максимума, даты постов считаются от их номера. Поэтому число процессов
+не влияет на данные. Авторы, группы и посты выбираются по закону Ципфа:
+у первых пользователей больше всего постов и подписчиков, у свежих
+постов — комментариев.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Comment, Follow, Group, Post, User
+from .transfer import bulk_insert
+
+# Порция, которую генерирует один процесс; от неё зависят данные.
+CHUNK = 10000
+START_DATE = datetime(2022, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=365)
+GROUP_SHARE = 0.7
+# Пароль всех сгенерированных пользователей, чтобы входить под ними
+# в нагрузочных сценариях.
+SEED_PASSWORD = 'seed-password'
+WORDS = (
+    'автор', 'бег', 'вечер', 'город', 'дом', 'дорога', 'друг', 'ёлка',
+    'жизнь', 'звезда', 'зима', 'игра', 'книга', 'кот', 'лес', 'лето',
+    'мир', 'море', 'ночь', 'окно', 'осень', 'песня', 'письмо', 'поле',
+    'река', 'сад', 'свет', 'снег', 'солнце', 'слово', 'старый', 'новый',
+    'тёплый', 'тихий', 'утро', 'улица', 'фото', 'хлеб', 'цвет', 'чай',
+    'школа', 'шум', 'яблоко', 'гулять', 'читать', 'писать', 'видеть',
+    'думать', 'любить', 'ждать', 'знать', 'помнить', 'сегодня', 'вчера',
+    'завтра', 'долго', 'быстро', 'очень', 'снова', 'всегда',
+)
+
+
+class SeedPlan(NamedTuple):
+    seed: int
+    users: int
+    groups: int
+    posts: int
+    comments: int
+    follows_per_user: int
+    first_user: int
+    first_group: int
+    first_post: int
+
+
+def make_plan(seed, users, groups, posts, comments, follows_per_user):
+    """План генерации с id после уже существующих строк."""
+    def first_id(model):
+        return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+    return SeedPlan(
+        seed, users, groups, posts, comments, follows_per_user,
+        first_id(User), first_id(Group), first_id(Post),
+    )
+
+
+def zipf_rank(rng, n):
+    """Ранг от 0 до n - 1 с вероятностью примерно 1 / (ранг + 1)."""
+    return min(int((n + 1) ** rng.random()) - 1, n - 1)
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def post_date(plan, index):
+    return START_DATE + SPAN * (index / max(plan.posts, 1))
+
+
+def _users(plan, rng, indexes):
+    return [(plan.first_user + index,) for index in indexes]
+
+
+def _groups(plan, rng, indexes):
+    return [
+        (plan.first_group + index, sentence(rng, 2, 4), sentence(rng, 5, 20))
+        for index in indexes
+    ]
+
+
+def _posts(plan, rng, indexes):
+    rows = []
+    for index in indexes:
+        group_id = None
+        if plan.groups and rng.random() < GROUP_SHARE:
+            group_id = plan.first_group + zipf_rank(rng, plan.groups)
+        rows.append((
+            plan.first_post + index,
+            plan.first_user + zipf_rank(rng, plan.users),
+            group_id,
+            '. '.join(
+                sentence(rng, 4, 12) for _ in range(rng.randint(1, 5))
+            ) + '.',
+            post_date(plan, index),
+        ))
+    return rows
+
+
+def _comments(plan, rng, indexes):
+    rows = []
+    for _ in indexes:
+        post = plan.posts - 1 - zipf_rank(rng, plan.posts)
+        rows.append((
+            plan.first_post + post,
+            plan.first_user + rng.randrange(plan.users),
+            sentence(rng, 2, 15) + '.',
+            post_date(plan, post) + timedelta(seconds=rng.randrange(86400)),
+        ))
+    return rows
+
+
+def _follows(plan, rng, indexes):
+    rows = []
+    limit = (plan.users - 1) // 2
+    for index in indexes:
+        wanted = min(
+            int(rng.expovariate(1 / plan.follows_per_user)), limit
+        ) if plan.follows_per_user else 0
+        authors = set()
+        for _ in range(wanted * 4):
+            if len(authors) == wanted:
+                break
+            author = zipf_rank(rng, plan.users)
+            if author != index:
+                authors.add(author)
+        rows.extend(
+            (plan.first_user + index, plan.first_user + author)
+            for author in sorted(authors)
+        )
+    return rows
+
+
+MODELS = {
+    'users': User,
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+GENERATORS = {
+    'users': _users,
+    'groups': _groups,
+    'posts': _posts,
+    'comments': _comments,
+    'follows': _follows,
+}
+# Порядок важен: строки ссылаются на вставленные раньше.
+KINDS = tuple(GENERATORS)
+
+
+def tasks(plan, kind):
+    """Порции (план, вид, начало, конец) для процессов."""
+    total = plan.users if kind == 'follows' else getattr(plan, kind)
+    for start in range(0, total, CHUNK):
+        yield plan, kind, start, min(start + CHUNK, total)
+
+
+def generate(task):
+    """Строки одной порции; выполняется в дочернем процессе."""
+    plan, kind, start, stop = task
+    rng = random.Random(f'{plan.seed}:{kind}:{start}')
+    return kind, GENERATORS[kind](plan, rng, range(start, stop))
+
+
+def _build(kind, row, password):
+    if kind == 'users':
+        pk, = row
+        return User(
+            id=pk, username=f'seed_{pk}', password=password,
+            date_joined=START_DATE,
+        )
+    if kind == 'groups':
+        pk, title, description = row
+        return Group(
+            id=pk, title=title[:200], slug=f'seed-{pk}',
+            description=description, pub_date=START_DATE,
+        )
+    if kind == 'posts':
+        pk, author_id, group_id, text, pub_date = row
+        return Post(
+            id=pk, author_id=author_id, group_id=group_id, text=text,
+            pub_date=pub_date,
+        )
+    if kind == 'comments':
+        post_id, author_id, text, pub_date = row
+        return Comment(
+            post_id=post_id, author_id=author_id, text=text,
+            pub_date=pub_date,
+        )
+    user_id, author_id = row
+    return Follow(user_id=user_id, author_id=author_id)
+
+
+def seed_password():
+    # Соль постоянная, чтобы хэш, как и остальные данные, не зависел
+    # от запуска.
+    return make_password(SEED_PASSWORD, salt='yatube-seed')
+
+
+def store(kind, rows, batch_size, password):
+    """Вставить порцию одной транзакцией, вернуть число строк."""
+    with transaction.atomic():
+        bulk_insert(
+            MODELS[kind], [_build(kind, row, password) for row in rows],
+            batch_size,
+        )
+    return len(rows)
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump_version
+
+from . import counters, follows, search, timelines
+from .models import Comment, Follow, Group, Post
+
+FEED_CACHE_NAMESPACE = 'feed'
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk is not None and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        for key, queryset in counters.post_counters(instance):
+            counters.change_count(key, queryset, 1)
+        timelines.fan_out(instance)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id == instance.group_id:
+        return
+    if previous_group_id is not None:
+        counters.change_count(
+            counters.group_posts_key(previous_group_id),
+            Post.objects.filter(group_id=previous_group_id), -1
+        )
+    if instance.group_id is not None:
+        counters.change_count(
+            counters.group_posts_key(instance.group_id),
+            Post.objects.filter(group_id=instance.group_id), 1
+        )
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    for key, queryset in counters.post_counters(instance):
+        counters.change_count(key, queryset, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follows.follow_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    follows.follow_changed(instance, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timelines.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timelines.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.comment_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_feed_cache(sender, **kwargs):
+    bump_version(FEED_CACHE_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_fragment(sender, instance, **kwargs):
+    cache.delete(make_template_fragment_key('post_comment', [instance.pk]))
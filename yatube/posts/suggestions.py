@@ -0,0 +1,88 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Follow, FollowSuggestion
+
+# Для каждого пользователя из диапазона id: авторы, на которых подписаны
+# его подписки, кроме него самого и тех, на кого он уже подписан. Вес —
+# число таких подписок. Пересечение множеств считает база по индексу
+# (user, author) таблицы Follow; наружу выходят только первые места.
+SUGGESTIONS_SQL = '''
+SELECT user_id, author_id, score FROM (
+    SELECT
+        mine.user_id AS user_id,
+        theirs.author_id AS author_id,
+        COUNT(*) AS score,
+        ROW_NUMBER() OVER (
+            PARTITION BY mine.user_id
+            ORDER BY COUNT(*) DESC, theirs.author_id
+        ) AS place
+    FROM {follow} mine
+    JOIN {follow} theirs ON theirs.user_id = mine.author_id
+    WHERE mine.user_id BETWEEN %s AND %s
+        AND theirs.author_id <> mine.user_id
+        AND NOT EXISTS (
+            SELECT 1 FROM {follow} own
+            WHERE own.user_id = mine.user_id
+                AND own.author_id = theirs.author_id
+        )
+    GROUP BY mine.user_id, theirs.author_id
+) ranked
+WHERE place <= %s
+'''
+
+
+def user_ranges(batch_size):
+    """Смежные диапазоны id подписчиков по batch_size пользователей.
+
+    Диапазоны покрывают все id без пропусков, чтобы при записи заодно
+    стирались подсказки тех, кто перестал на кого-либо подписываться.
+    """
+    user_ids = Follow.objects.values_list(
+        'user_id', flat=True).distinct().order_by('user_id').iterator()
+    low = 0
+    batch = list(islice(user_ids, batch_size))
+    while batch:
+        yield low, batch[-1]
+        low = batch[-1] + 1
+        batch = list(islice(user_ids, batch_size))
+
+
+def compute_suggestions(bounds):
+    """Посчитать подсказки для диапазона id, вернуть (границы, строки)."""
+    low, high = bounds
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SUGGESTIONS_SQL.format(follow=Follow._meta.db_table),
+            [low, high, settings.FOLLOW_SUGGESTIONS],
+        )
+        return bounds, cursor.fetchall()
+
+
+def store_suggestions(bounds, rows):
+    low, high = bounds
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(
+            user_id__gte=low, user_id__lte=high).delete()
+        FollowSuggestion.objects.bulk_create([
+            FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+            for user_id, author_id, score in rows
+        ])
+    return len(rows)
+
+
+def clear_suggestions_after(user_id):
+    FollowSuggestion.objects.filter(user_id__gt=user_id).delete()
+
+
+def suggestions_for(user):
+    """Подсказки для страницы подписок одним запросом.
+
+    Авторы, на которых пользователь подписался после расчёта,
+    отбрасываются в том же запросе.
+    """
+    return FollowSuggestion.objects.filter(user=user).exclude(
+        author__following__user=user).select_related(
+        'author')[:settings.FOLLOW_SUGGESTIONS]
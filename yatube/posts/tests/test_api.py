@@ -0,0 +1,160 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def feed_urls(self):
+        return [
+            reverse('api_v1:index'),
+            reverse('api_v1:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'api_v1:profile', kwargs={'username': self.author.username}
+            ),
+            reverse('api_v1:follow_index'),
+        ]
+
+    def test_feeds_payload(self):
+        """Проверка JSON лент совпадает с постами HTML-страниц"""
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                data = response.json()
+                self.assertEqual(data['results'][0], {
+                    'id': self.post.pk,
+                    'text': self.post.text,
+                    'pub_date': data['results'][0]['pub_date'],
+                    'author': self.author.username,
+                    'group': self.group.slug,
+                    'image': None,
+                    'comment_count': 1,
+                })
+                self.assertIsNone(data['next'])
+                self.assertNotIn(b': ', response.content)
+
+    def test_not_modified(self):
+        """Проверка повторный запрос с ETag получает 304"""
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                etag = response['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_feed_ignores_if_modified_since(self):
+        """Проверка лента без Last-Modified: правка старого поста видна
+        клиенту, который присылает только If-Modified-Since"""
+        url = reverse('api_v1:index')
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][-1]['text'], 'Исправленный текст'
+        )
+
+    def test_not_modified_is_cheap(self):
+        """Проверка ответ 304 стоит одного запроса к базе"""
+        self.client.logout()
+        url = reverse('api_v1:index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_new_post(self):
+        """Проверка новый пост меняет ETag ленты"""
+        url = reverse('api_v1:index')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_etag_depends_on_cursor(self):
+        """Проверка у разных страниц ленты разные ETag"""
+        url = reverse('api_v1:index')
+        self.assertNotEqual(
+            self.client.get(url)['ETag'],
+            self.client.get(url, {'cursor': 'x'})['ETag'],
+        )
+
+    def test_follow_feed_requires_login(self):
+        """Проверка лента подписок без авторизации отдаёт 401"""
+        self.client.logout()
+        response = self.client.get(reverse('api_v1:follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_detail(self):
+        """Проверка JSON поста с комментариями и 304 до нового
+        комментария"""
+        self.client.force_login(self.author)
+        url = reverse('api_v1:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        data = response.json()
+        self.assertEqual(data['id'], self.post.pk)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']['results']],
+            ['Комментарий'],
+        )
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Ещё')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_post_detail_hides_comments_from_others(self):
+        """Проверка JSON поста не отдаёт комментарии анониму и чужому
+        пользователю"""
+        url = reverse('api_v1:post_detail', kwargs={'post_id': self.post.pk})
+        anonymous = self.client_class()
+        for client in (self.client, anonymous):
+            with self.subTest(client=client):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('comments', response.json())
+                self.assertNotContains(response, 'Комментарий')
+
+    def test_post_detail_missing(self):
+        """Проверка JSON несуществующего поста отдаёт 404"""
+        response = self.client.get(
+            reverse('api_v1:post_detail', kwargs={'post_id': 0}),
+            HTTP_IF_MODIFIED_SINCE=http_date(),
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import (ALL_POSTS_KEY, author_posts_key, group_posts_key,
+                        post_count)
+from ..models import Comment, Counter, Group, Post
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def value(self, key):
+        return Counter.objects.get(key=key).value
+
+    def test_counters_follow_create_edit_delete(self):
+        """Проверка счётчики меняются при создании, правке и удалении"""
+        post = Post.objects.create(
+            text='Тестовый пост', author=self.user, group=self.group
+        )
+        self.assertEqual(self.value(ALL_POSTS_KEY), 1)
+        self.assertEqual(self.value(author_posts_key(self.user.pk)), 1)
+        self.assertEqual(self.value(group_posts_key(self.group.pk)), 1)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.value(group_posts_key(self.group.pk)), 0)
+        self.assertEqual(self.value(group_posts_key(self.other_group.pk)), 1)
+        post.delete()
+        self.assertEqual(self.value(ALL_POSTS_KEY), 0)
+        self.assertEqual(self.value(author_posts_key(self.user.pk)), 0)
+
+    def test_reconcile_fixes_drift(self):
+        """Проверка команда сверки исправляет рассинхрон счётчиков"""
+        Post.objects.bulk_create([
+            Post(text=f'Пост {number}', author=self.user, group=self.group)
+            for number in range(3)
+        ])
+        Counter.objects.create(key=group_posts_key(0), value=5)
+        call_command('reconcile_post_counts', stdout=StringIO())
+        self.assertEqual(post_count(), 3)
+        self.assertEqual(post_count(author_id=self.user.pk), 3)
+        self.assertEqual(post_count(group_id=self.group.pk), 3)
+        self.assertFalse(
+            Counter.objects.filter(key=group_posts_key(0)).exists()
+        )
+
+    def test_profile_count_uses_counter(self):
+        """Проверка профиль показывает число постов из счётчика"""
+        Post.objects.create(text='Тестовый пост', author=self.user)
+        Counter.objects.filter(
+            key=author_posts_key(self.user.pk)).update(value=42)
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 42)
+
+
+class CommentCountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_add_comment_updates_post(self):
+        """Проверка add_comment увеличивает comment_count поста"""
+        for number in range(2):
+            self.client.post(
+                reverse('posts:add_comment',
+                        kwargs={'post_id': self.post.pk}),
+                {'text': f'Комментарий {number}'},
+            )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(
+            self.post.last_comment_at, Comment.objects.first().pub_date
+        )
+
+    def test_delete_comment_updates_post(self):
+        """Проверка удаление комментария уменьшает comment_count"""
+        first = Comment.objects.create(
+            post=self.post, author=self.user, text='Первый')
+        last = Comment.objects.create(
+            post=self.post, author=self.user, text='Второй')
+        last.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, first.pub_date)
+        first.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+
+    def test_reconcile_comment_counts(self):
+        """Проверка команда пересчитывает активность комментариев"""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        Post.objects.update(comment_count=7, last_comment_at=None)
+        call_command('reconcile_comment_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, comment.pub_date)
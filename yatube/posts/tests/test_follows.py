@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..follows import (followed_ids, follower_count, followers_key,
+                       following_count)
+from ..models import Counter, Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def follow(self, author):
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        ))
+
+    def unfollow(self, author):
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}
+        ))
+
+    def test_counts_follow_and_unfollow(self):
+        """Проверка счётчики подписчиков и подписок"""
+        for author in self.authors:
+            self.follow(author)
+        self.assertEqual(following_count(self.user.pk), 3)
+        self.assertEqual(follower_count(self.authors[0].pk), 1)
+        self.unfollow(self.authors[0])
+        self.assertEqual(following_count(self.user.pk), 2)
+        self.assertEqual(follower_count(self.authors[0].pk), 0)
+
+    def test_followed_ids_invalidated(self):
+        """Проверка кэш подписок сбрасывается при подписке и отписке"""
+        self.assertEqual(followed_ids(self.user), frozenset())
+        self.follow(self.authors[0])
+        self.assertEqual(followed_ids(self.user), {self.authors[0].pk})
+        with self.assertNumQueries(0):
+            followed_ids(self.user)
+        self.unfollow(self.authors[0])
+        self.assertEqual(followed_ids(self.user), frozenset())
+
+    def test_profile_shows_counts(self):
+        """Проверка профиль показывает число подписчиков из счётчика"""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        Counter.objects.filter(
+            key=followers_key(self.authors[0].pk)).update(value=42)
+        response = self.client.get(reverse(
+            'posts:profile', kwargs={'username': self.authors[0].username}
+        ))
+        self.assertEqual(response.context['follower_count'], 42)
+        self.assertTrue(response.context['following'])
+
+    def test_reconcile_follow_counts(self):
+        """Проверка команда сверки исправляет счётчики подписок"""
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=author) for author in self.authors
+        ])
+        call_command('reconcile_follow_counts', stdout=StringIO())
+        self.assertEqual(following_count(self.user.pk), 3)
+        self.assertEqual(follower_count(self.authors[2].pk), 1)
@@ -1,13 +1,21 @@
+import os
 import shutil
 import tempfile
+from io import BytesIO, StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
 
+from ..forms import PostForm
 from ..models import Post, Group, Comment
 
 User = get_user_model()
@@ -92,12 +100,73 @@ class PostCreateFormTests(TestCase):
             (post.text, form_data['text']),
             (post.author, self.user),
             (post.group.pk, form_data['group']),
-            (post.image, f"posts/{form_data['image'].name}"),
+            (os.path.splitext(post.image.name)[0], 'posts/image'),
         ]
         for first_object, first_result in form_data_result:
             with self.subTest(first_object=first_object):
                 self.assertEqual(first_object, first_result)
 
+    @override_settings(THUMBNAIL_PREGENERATE_WORKERS=0)
+    def test_thumbnail_is_generated_on_upload(self):
+        """Проверка миниатюра создаётся при загрузке, а не при показе"""
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=self.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        source = ImageFile(post.image.name, default_storage)
+        self.assertIsNotNone(default.kvstore.get(source))
+
+    def test_generate_thumbnails_command(self):
+        """Проверка команда создаёт миниатюры для уже загруженных картинок"""
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        source = ImageFile(self.post.image.name, default_storage)
+        self.assertIsNotNone(default.kvstore.get(source))
+
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_uploaded_image_is_normalized(self):
+        """Проверка картинка уменьшается и теряет метаданные при загрузке"""
+        exif = Image.Exif()
+        exif[0x010e] = 'Секретное описание'
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        uploaded = SimpleUploadedFile(
+            name='big.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Большая картинка', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Большая картинка')
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+
+    def test_truncated_image_is_form_error(self):
+        """Проверка обрезанная картинка даёт ошибку формы, а не 500"""
+        buffer = BytesIO()
+        Image.effect_noise((400, 400), 64).convert('RGB').save(
+            buffer, 'JPEG'
+        )
+        uploaded = SimpleUploadedFile(
+            name='broken.jpg',
+            content=buffer.getvalue()[:800],
+            content_type='image/jpeg'
+        )
+        form = PostForm(data={'text': 'Битая картинка'},
+                        files={'image': uploaded})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
     def test_create_existing_slug(self):
         """При отправке валидной формы со страницы редактирования
          поста reverse('posts:post_edit', args=('post_id',))
@@ -0,0 +1,89 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+from ..paginator import CURSOR_NEXT, encode_cursor
+
+User = get_user_model()
+
+FEED_QUERY = re.compile(
+    r'FROM "posts_(post|comment|timelineentry)".*'
+    r'ORDER BY .*"(pub_date|last_comment_at)" DESC',
+    re.S
+)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedIndexesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.own_post = Post.objects.create(
+            text='Свой пост', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(
+            text='Тестовый комментарий', author=cls.user, post=cls.own_post
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        return [
+            query['sql'] for query in context.captured_queries
+            if FEED_QUERY.search(query['sql'])
+        ]
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def test_feed_queries_use_index_without_sort(self):
+        """Проверка ленты читаются по индексу без сортировки в памяти"""
+        cursor = encode_cursor(CURSOR_NEXT, timezone.now(), 10 ** 9)
+        urls = [
+            reverse('posts:index'),
+            f"{reverse('posts:index')}?cursor={cursor}",
+            f"{reverse('posts:index')}?sort=activity",
+            f"{reverse('posts:index')}?sort=activity&cursor={cursor}",
+            f"{reverse('posts:follow_index')}?cursor={cursor}",
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.own_post.pk}),
+        ]
+        for url in urls:
+            queries = self.feed_queries(url)
+            with self.subTest(url=url):
+                self.assertTrue(queries)
+            for sql in queries:
+                plan = self.query_plan(sql)
+                with self.subTest(url=url, plan=plan):
+                    self.assertRegex(plan, r'USING (COVERING )?INDEX')
+                    self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..search import SearchResults, filter_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.rare = Post.objects.create(
+            text='Кот сидит на окне и смотрит на улицу', author=cls.user
+        )
+        cls.frequent = Post.objects.create(
+            text='Кот, кот и ещё раз кот', author=cls.user
+        )
+        cls.other = Post.objects.create(
+            text='Собака гуляет во дворе', author=cls.user
+        )
+
+    def search(self, query):
+        results = SearchResults(query)
+        return results[0:results.count()]
+
+    def test_results_ranked_by_bm25(self):
+        """Проверка результаты упорядочены по релевантности"""
+        self.assertEqual(self.search('кот'), [self.frequent, self.rare])
+
+    def test_index_follows_edit_and_delete(self):
+        """Проверка индекс обновляется при правке и удалении поста"""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Кот прогнал собаку'
+        post.save()
+        self.assertEqual(self.search('прогнал'), [post])
+        self.assertEqual(self.search('гуляет'), [])
+        post.delete()
+        self.assertEqual(self.search('прогнал'), [])
+
+    def test_query_operators_are_escaped(self):
+        """Проверка операторы FTS5 в запросе не ломают поиск"""
+        for query in ('кот OR', '"кот', 'NEAR(кот', '*', 'кот-собака'):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('posts:search'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_prefix_search(self):
+        """Проверка последнее слово ищется по префиксу"""
+        self.assertEqual(self.search('соба'), [self.other])
+
+    def test_rebuild_search_index(self):
+        """Проверка команда заново заполняет индекс"""
+        Post.objects.bulk_create([
+            Post(text='Попугай говорит', author=self.user)
+        ])
+        self.assertEqual(self.search('попугай'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('попугай')), 1)
+
+    def test_admin_search_uses_index(self):
+        """Проверка поиск в админке идёт через индекс"""
+        self.assertEqual(
+            set(filter_posts(Post.objects.all(), 'кот')),
+            {self.rare, self.frequent},
+        )
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    @override_settings(QUANTITY_POSTS=1)
+    def test_search_view_paginates_with_query(self):
+        """Проверка страницы поиска сохраняют запрос"""
+        response = self.client.get(reverse('posts:search'), {'q': 'кот'})
+        self.assertEqual(
+            list(response.context['page_obj'].object_list), [self.frequent]
+        )
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&page=2')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кот', 'page': 2}
+        )
+        self.assertEqual(
+            list(response.context['page_obj'].object_list), [self.rare]
+        )
@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from ..counters import post_count
+from ..models import Comment, Follow, Group, Post
+from ..seeding import SEED_PASSWORD
+
+User = get_user_model()
+
+
+class SeedYatubeTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def seed(self, seed=1):
+        call_command(
+            'seed_yatube', seed=seed, users=50, groups=3, posts=300,
+            comments=200, follows_per_user=4, workers=1, batch_size=100,
+            stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author', 'group', 'text', 'pub_date')),
+            list(Comment.objects.order_by('pk').values_list(
+                'post', 'author', 'text', 'pub_date')),
+            list(Follow.objects.order_by('pk').values_list(
+                'user', 'author')),
+        )
+
+    def test_volumes_and_distribution(self):
+        """Проверка объёмы данных и перекос популярности авторов"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        posts = list(Post.objects.values('author').annotate(
+            total=Count('pk')).order_by('-total').values_list(
+            'author', 'total'))
+        top_author, top_total = posts[0]
+        self.assertGreater(top_total, 300 / 50 * 5)
+        self.assertEqual(post_count(author_id=top_author), top_total)
+        user = User.objects.get(pk=top_author)
+        self.assertTrue(user.check_password(SEED_PASSWORD))
+
+    def test_same_seed_same_data(self):
+        """Проверка одно и то же зерно даёт одинаковые данные"""
+        self.seed()
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed(seed=2)
+        self.assertNotEqual(self.snapshot(), first)
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from ..suggestions import suggestions_for
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.first, cls.second, cls.popular, cls.rare = [
+            User.objects.create_user(username=name)
+            for name in ('auth', 'first', 'second', 'popular', 'rare')
+        ]
+        for user, author in (
+            (cls.user, cls.first),
+            (cls.user, cls.second),
+            (cls.first, cls.popular),
+            (cls.first, cls.rare),
+            (cls.first, cls.second),
+            (cls.second, cls.popular),
+            (cls.second, cls.user),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def tearDown(self):
+        cache.clear()
+
+    def compute(self, **options):
+        call_command(
+            'compute_follow_suggestions', workers=1, stdout=StringIO(),
+            **options
+        )
+
+    def test_suggestions_ranked_by_overlap(self):
+        """Проверка подсказки упорядочены по числу общих подписок"""
+        self.compute(batch_size=2)
+        self.assertEqual(
+            [(item.author, item.score) for item in suggestions_for(self.user)],
+            [(self.popular, 2), (self.rare, 1)],
+        )
+
+    def test_recompute_drops_stale_suggestions(self):
+        """Проверка пересчёт стирает устаревшие подсказки"""
+        self.compute()
+        Follow.objects.filter(user=self.user).delete()
+        self.compute(batch_size=1)
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.user).exists()
+        )
+
+    def test_follow_index_reads_suggestions(self):
+        """Проверка страница подписок показывает подсказки без
+        уже отслеживаемых авторов"""
+        self.compute()
+        Follow.objects.create(user=self.user, author=self.rare)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.popular],
+        )
+        with self.assertNumQueries(1):
+            list(suggestions_for(self.user))
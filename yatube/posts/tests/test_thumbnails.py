@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from ..models import Post
+from ..thumbnails import attach_thumbnails, generate_thumbnail
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class AttachThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый пост {number}',
+                author=cls.user,
+                image=SimpleUploadedFile(
+                    name=f'small{number}.gif',
+                    content=small_gif,
+                    content_type='image/gif'
+                ),
+            )
+            for number in range(3)
+        ]
+        cls.post_without_image = Post.objects.create(
+            text='Пост без картинки', author=cls.user
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_page_thumbnails_resolved_in_one_lookup(self):
+        """Проверка миниатюры страницы находятся одним запросом"""
+        expected = [generate_thumbnail(post.image.name).url
+                    for post in self.posts]
+        cache.clear()
+        posts = list(Post.objects.filter(pk__in=[
+            post.pk for post in self.posts
+        ]).order_by('pk')) + [self.post_without_image]
+        with self.assertNumQueries(1):
+            attach_thumbnails(posts)
+        self.assertEqual(
+            [post.thumbnail.url for post in posts[:-1]], expected
+        )
+        self.assertIsNone(posts[-1].thumbnail)
+        with self.assertNumQueries(0):
+            attach_thumbnails(posts)
+
+    def test_missing_thumbnail_left_for_template(self):
+        """Проверка без готовой миниатюры шаблон создаст её сам"""
+        posts = attach_thumbnails(list(Post.objects.exclude(image='')))
+        self.assertTrue(all(post.thumbnail is None for post in posts))
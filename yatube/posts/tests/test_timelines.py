@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineBackfill, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Проверка новый пост попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Проверка подписка дополняет ленту, отписка чистит её"""
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.feed(), [post])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_pulled_on_read(self):
+        """Проверка посты знаменитостей читаются без раскладки по лентам"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_follow_over_limit_shows_posts_at_once(self):
+        """Проверка подписчик, сделавший автора знаменитостью, сразу
+        видит его посты"""
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        self.assertEqual(self.feed(), [])
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.feed(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_drop_under_limit_keeps_celebrity_posts(self):
+        """Проверка посты, написанные знаменитостью, остаются в лентах
+        после падения числа подписчиков ниже порога"""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        self.assertEqual(self.feed(), [post])
+        Follow.objects.filter(user=other).delete()
+        # Отписка не раскладывает посты сама, до разбора очереди они
+        # подтягиваются при чтении.
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post])
+        call_command('backfill_timelines', stdout=StringIO())
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertFalse(TimelineBackfill.objects.exists())
+        self.assertEqual(self.feed(), [post])
+
+    def test_rebuild_timelines(self):
+        """Проверка команда пересборки восстанавливает ленты"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Тестовый пост', author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), [post])
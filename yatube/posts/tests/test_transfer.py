@@ -0,0 +1,163 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..counters import author_posts_key, post_count
+from ..models import Counter, Follow, Group, Post, TimelineEntry
+from ..search import SearchResults
+
+User = get_user_model()
+
+
+class PostTransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(5):
+            Post.objects.create(
+                text=f'Пост номер {number}, "с кавычками"\nи переносом',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+        Post.objects.update(
+            pub_date=datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        cache.clear()
+
+    def snapshot(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'text', 'author', 'group', 'pub_date'
+        ))
+
+    def round_trip(self, name, fmt):
+        path = os.path.join(self.directory.name, name)
+        call_command(
+            'export_posts', path, format=fmt, chunk_size=2,
+            stdout=StringIO(),
+        )
+        before = self.snapshot()
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=out)
+        self.assertIn('Загружено постов: 5, пропущено: 0', out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+
+    def test_round_trip(self):
+        """Проверка выгрузка и загрузка сохраняют посты с датами"""
+        for name, fmt in (('posts.ndjson', 'ndjson'), ('posts.csv', 'csv')):
+            with self.subTest(fmt=fmt):
+                self.round_trip(name, fmt)
+
+    def test_import_refreshes_derived_data(self):
+        """Проверка после загрузки обновлены счётчики, поиск и ленты"""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        call_command('export_posts', path, stdout=StringIO())
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(post_count(author_id=self.author.pk), 10)
+        self.assertEqual(post_count(group_id=self.group.pk), 4)
+        self.assertEqual(SearchResults('номер').count(), 10)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 10
+        )
+
+    def test_import_leaves_other_authors(self):
+        """Проверка загрузка не пересчитывает данные чужих авторов"""
+        other = User.objects.create_user(username='other')
+        Counter.objects.create(key=author_posts_key(other.pk), value=42)
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        call_command('export_posts', path, stdout=StringIO())
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(post_count(author_id=other.pk), 42)
+        self.assertEqual(post_count(author_id=self.author.pk), 10)
+
+    def test_unknown_author_and_group_skipped(self):
+        """Проверка строки с неизвестным автором или группой пропускаются"""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"author": "nobody", "group": "", "text": "x",'
+                ' "pub_date": "2020-01-01T00:00:00+00:00"}\n'
+                '{"author": "author", "group": "missing", "text": "x",'
+                ' "pub_date": "2020-01-01T00:00:00+00:00"}\n'
+                '{"author": "author", "group": "test-slug", "text": "x",'
+                ' "pub_date": "2020-01-01T00:00:00+00:00"}\n'
+            )
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('Загружено постов: 1, пропущено: 2', out.getvalue())
+
+    def test_large_batch_fits_query_limits(self):
+        """Проверка большая пачка не упирается в лимит параметров SQLite"""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for number in range(600):
+                stream.write(
+                    f'{{"author": "author", "text": "Пост {number}",'
+                    f' "pub_date": "2020-01-01T00:00:00+00:00"}}\n'
+                )
+        out = StringIO()
+        call_command('import_posts', path, batch_size=1000, stdout=out)
+        self.assertIn('Загружено постов: 600', out.getvalue())
+
+    def test_malformed_rows_skipped(self):
+        """Проверка битые строки пропускаются, а не обрывают загрузку"""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        good = (
+            '{"author": "author", "text": "Целый пост",'
+            ' "pub_date": "2020-01-01T00:00:00+00:00"}\n'
+        )
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(good * 3)
+            stream.write(
+                '{"author": "author", "text": "x", "pub_date": "yesterday"}\n'
+                '{"author": "author", "text": "x"}\n'
+                '{"author": "author", "text": "x", "pub_date": '
+                '"2020-13-01T00:00:00"}\n'
+                '{"author": "author", "text": \n'
+                '[1, 2]\n'
+            )
+            stream.write(good)
+        self.assertEqual(post_count(), 5)
+        out = StringIO()
+        call_command('import_posts', path, batch_size=3, stdout=out)
+        self.assertIn('Загружено постов: 4, пропущено: 5', out.getvalue())
+        self.assertEqual(post_count(), 9)
+        self.assertEqual(SearchResults('Целый').count(), 4)
+
+    def test_failed_import_refreshes_derived_data(self):
+        """Проверка при ошибке базы загруженное учтено в счётчиках"""
+        path = os.path.join(self.directory.name, 'posts.ndjson')
+        taken = Post.objects.order_by('pk').first().pk
+        with open(path, 'w', encoding='utf-8') as stream:
+            for pk in (1000, 1001, taken):
+                stream.write(
+                    f'{{"id": {pk}, "author": "author", "text": "Пост",'
+                    f' "pub_date": "2020-01-01T00:00:00+00:00"}}\n'
+                )
+        self.assertEqual(post_count(), 5)
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_posts', path, batch_size=2, keep_ids=True,
+                stdout=StringIO(),
+            )
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertEqual(post_count(), 7)
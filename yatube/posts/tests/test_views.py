@@ -1,5 +1,6 @@
 import tempfile
 import shutil
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
@@ -7,9 +8,11 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.utils import timezone
 
-from ..models import Post, Group, Follow
+from ..models import Comment, Post, Group, Follow
 from ..forms import PostForm
+from ..paginator import CURSOR_NEXT, CursorPaginator, encode_cursor
 
 User = get_user_model()
 
@@ -133,24 +136,36 @@ class PostPagesTests(TestCase):
         self.assertNotIn(self.post, response.context['page_obj'])
 
     def test_cache(self):
-        """Проверка кэша"""
+        """Проверка кэша главной страницы и его сброса по сигналам"""
         response = self.authorized_client.get(reverse('posts:index'))
-        Post.objects.create(
-            text='Новый тестовый пост',
-            author=self.user,
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
         content_second = self.authorized_client.get(reverse('posts:index')
                                                     ).content
         self.assertEqual(
             response.content,
             content_second
         )
-        cache.clear()
+        Post.objects.create(
+            text='Новый тестовый пост',
+            author=self.user,
+        )
         self.assertNotEqual(
             content_second,
             self.authorized_client.get(reverse('posts:index')).content
         )
 
+    def test_post_fragment_is_shared_between_feeds(self):
+        """Проверка фрагмент поста общий для лент и живёт до правки"""
+        group_url = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug})
+        self.guest_client.get(reverse(
+            'posts:profile', kwargs={'username': self.user.username}))
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        self.assertNotContains(
+            self.guest_client.get(group_url), 'Без сигналов')
+        Post.objects.get(pk=self.post.pk).save()
+        self.assertContains(self.guest_client.get(group_url), 'Без сигналов')
+
 
 class PostPaginatorViewsTest(TestCase):
     @classmethod
@@ -214,6 +229,227 @@ class PostPaginatorViewsTest(TestCase):
                 response = self.client.get(reverse_name + f'?page={page}')
                 self.assertEqual(len(response.context['page_obj']), page_obj)
 
+    def test_cursor_pages_cover_all_posts(self):
+        """Проверка курсорной пагинации: вперёд и назад без пропусков"""
+        for reverse_name in self.temlate_name:
+            with self.subTest(reverse_name=reverse_name):
+                first = self.client.get(reverse_name).context['page_obj']
+                self.assertIsNone(first.previous_cursor)
+                second = self.client.get(
+                    reverse_name, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(first) + len(second), self.NUMBER_OF_POST
+                )
+                self.assertIsNone(second.next_cursor)
+                back = self.client.get(
+                    reverse_name, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(back.object_list, first.object_list)
+
+    def test_cursor_page_does_not_count_posts(self):
+        """Проверка страница по курсору не выполняет COUNT(*)"""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.QUANTITY_POSTS
+        )
+        cursor = paginator.get_cursor_page().next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.get_cursor_page(cursor)
+        self.assertEqual(len(page), settings.QUANTITY_POSTS)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Проверка битый курсор отдаёт первую страницу"""
+        response = self.client.get(reverse('posts:index'), {'cursor': '!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'].cursor)
+
+    def test_out_of_range_cursor_returns_first_page(self):
+        """Проверка курсор с огромным id или датой вне диапазона не
+        роняет ленты"""
+        cursors = [
+            encode_cursor(CURSOR_NEXT, timezone.now(), 10 ** 30),
+            encode_cursor(CURSOR_NEXT, datetime(
+                9999, 12, 31, 23, 59, 59,
+                tzinfo=dt_timezone(timedelta(hours=-14)),
+            ), 1),
+        ]
+        for cursor in cursors:
+            for url in (reverse('posts:index'), reverse('api_v1:index')):
+                with self.subTest(cursor=cursor, url=url):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+
+
+@override_settings(QUANTITY_COMMENTS=3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        for number in range(7):
+            commenter = User.objects.create_user(username=f'user{number}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_comments(self):
+        """Проверка post_detail выводит первую порцию комментариев"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.QUANTITY_COMMENTS)
+        self.assertEqual(comments[0], Comment.objects.first())
+        self.assertIsNotNone(response.context['comments_page'].next_cursor)
+
+    def test_comment_authors_loaded_in_one_query(self):
+        """Проверка авторы комментариев грузятся вместе с ними"""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        # Пост, сессия и пользователь для проверки доступа, комментарии.
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_load_more_returns_next_comments(self):
+        """Проверка «показать ещё» отдаёт следующие комментарии"""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {'cursor': cursor or ''})
+            seen += response.context['comments']
+            cursor = response.context['comments_page'].next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Comment.objects.all()))
+        self.assertNotContains(response, '<html')
+
+    def test_comments_hidden_from_other_users(self):
+        """Проверка комментарии не выбираются и не отдаются тем, кому
+        страница поста их не показывает"""
+        other = Client()
+        other.force_login(User.objects.get(username='user0'))
+        for client in (Client(), other):
+            with self.subTest(client=client):
+                response = client.get(reverse(
+                    'posts:post_detail', kwargs={'post_id': self.post.pk}
+                ))
+                self.assertEqual(list(response.context['comments']), [])
+                self.assertIsNone(response.context['comments_page'])
+                response = client.get(reverse(
+                    'posts:post_comments', kwargs={'post_id': self.post.pk}
+                ))
+                self.assertEqual(response.status_code, 404)
+
+    def test_load_more_missing_post(self):
+        """Проверка «показать ещё» для несуществующего поста"""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUANTITY_POSTS=1)
+class ActivitySortTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.discussed, cls.quiet, cls.recent = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+            for number in range(3)
+        ]
+        for post in (cls.discussed, cls.recent, cls.discussed):
+            Comment.objects.create(post=post, author=cls.user, text='Ещё')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_index_sorted_by_activity(self):
+        """Проверка ?sort=activity выводит обсуждаемые посты по свежести
+        последнего комментария, и курсор сохраняет сортировку"""
+        seen = []
+        params = {'sort': 'activity'}
+        while True:
+            response = self.client.get(reverse('posts:index'), params)
+            seen += response.context['page_obj'].object_list
+            cursor = response.context['page_obj'].next_cursor
+            if cursor is None:
+                break
+            self.assertContains(
+                response, f'?sort=activity&cursor={cursor}'
+            )
+            params = {'sort': 'activity', 'cursor': cursor}
+        self.assertEqual(seen, [self.discussed, self.recent])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_not_modified(self):
+        """Проверка страницы отвечают 304 на совпадающий ETag"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_cache_control(self):
+        """Проверка анонимам public, вошедшим private, Vary: Cookie"""
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                private = authorized_client.get(url)
+                self.assertIn('private', private['Cache-Control'])
+                self.assertNotEqual(response['ETag'], private['ETag'])
+
+    def test_etag_follows_changes(self):
+        """Проверка ETag меняется с новым постом, комментарием и
+        подпиской"""
+        self.client.force_login(self.user)
+        changes = [
+            (reverse('posts:index'), lambda: Post.objects.create(
+                text='Новый пост', author=self.author)),
+            (self.urls[3], lambda: self.post.comments.create(
+                author=self.user, text='Комментарий')),
+            (self.urls[2], lambda: Follow.objects.create(
+                user=self.user, author=self.author)),
+        ]
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
 
 class FollowTestsPosts(TestCase):
     @classmethod
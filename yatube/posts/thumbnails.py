@@ -0,0 +1,132 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+# Должны совпадать с параметрами тега {% thumbnail %} в шаблонах
+# includes/article.html и posts/post_detail.html.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def generate_thumbnail(name):
+    """Создать миниатюру, если её ещё нет в хранилище sorl."""
+    return get_thumbnail(name, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_PREGENERATE_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def pregenerate_thumbnail(name):
+    """Создать миниатюру, вернуть False при ошибке вместо исключения."""
+    try:
+        generate_thumbnail(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру для %s', name)
+        return False
+    return True
+
+
+def _generate_in_background(name):
+    try:
+        pregenerate_thumbnail(name)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnail(name):
+    """Поставить миниатюру в очередь фонового пула после коммита.
+
+    При THUMBNAIL_PREGENERATE_WORKERS = 0 миниатюра создаётся сразу.
+    """
+    if not settings.THUMBNAIL_PREGENERATE_WORKERS:
+        generate_thumbnail(name)
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_generate_in_background, name)
+    )
+
+
+def _thumbnail_file(name):
+    """ImageFile миниатюры с тем же именем, что выберет sorl.
+
+    Повторяет подготовку опций из ThumbnailBackend.get_thumbnail.
+    """
+    backend = default.backend
+    source = ImageFile(name)
+    options = dict(THUMBNAIL_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(backend._get_thumbnail_filename(
+        source, THUMBNAIL_GEOMETRY, options
+    ), default.storage)
+
+
+def _get_many_raw(keys):
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+        values.update(found)
+    return {
+        key: value for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def attach_thumbnails(posts):
+    """Найти миниатюры всех постов страницы одним обращением к sorl.
+
+    Найденная миниатюра кладётся в post.thumbnail, для остальных шаблон
+    по-прежнему вызовет {% thumbnail %}.
+    """
+    posts_by_key = {}
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            key = add_prefix(_thumbnail_file(post.image.name).key)
+            posts_by_key.setdefault(key, []).append(post)
+    if not posts_by_key:
+        return posts
+    for key, value in _get_many_raw(list(posts_by_key)).items():
+        thumbnail = deserialize_image_file(value)
+        for post in posts_by_key[key]:
+            post.thumbnail = thumbnail
+    return posts
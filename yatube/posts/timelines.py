@@ -0,0 +1,215 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .follows import follower_count, followed_ids
+from .models import Follow, Post, TimelineBackfill, TimelineEntry
+from .paginator import CursorPaginator
+
+CELEBRITIES_CACHE_KEY = 'timeline:celebrities'
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def is_celebrity(author_id):
+    """Больше ли у автора подписчиков, чем TIMELINE_FANOUT_LIMIT."""
+    return follower_count(author_id) > settings.TIMELINE_FANOUT_LIMIT
+
+
+def celebrity_ids():
+    """Авторы, чьи посты подтягиваются в ленты при чтении: знаменитости
+    и те, кто ждёт раскладки в TimelineBackfill."""
+    def compute():
+        return set(Follow.objects.values_list('author').annotate(
+            followers=Count('pk')).filter(
+            followers__gt=settings.TIMELINE_FANOUT_LIMIT).values_list(
+            'author', flat=True).order_by().union(
+            TimelineBackfill.objects.values_list('author_id', flat=True)))
+    return cache.get_or_set(
+        CELEBRITIES_CACHE_KEY, compute, settings.TIMELINE_CELEBRITIES_TIMEOUT
+    )
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id, post_id=post.pk,
+        author_id=post.author_id, pub_date=post.pub_date,
+    )
+
+
+def _check_celebrity(author_id, celebrity):
+    """Сбросить кэш знаменитостей, если автор пересёк порог, а кэш ещё
+    об этом не знает; вернуть True, если сбросили."""
+    if (author_id in celebrity_ids()) == celebrity:
+        return False
+    cache.delete(CELEBRITIES_CACHE_KEY)
+    return True
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    fan_out_posts([post])
+
+
+def fan_out_posts(posts):
+    """Разложить новые посты по лентам подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    for author_id, author_posts in by_author.items():
+        if is_celebrity(author_id):
+            _check_celebrity(author_id, True)
+            continue
+        followers = Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True).iterator()
+        entries = (
+            _entry(user_id, post)
+            for user_id in followers for post in author_posts
+        )
+        for batch in _batches(entries, settings.TIMELINE_BATCH_SIZE):
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _recent_posts(author_id):
+    return Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date')[:settings.TIMELINE_BACKFILL_SIZE]
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту свежие посты автора после подписки."""
+    if is_celebrity(author_id):
+        # Посты знаменитости подтягиваются при чтении, но только если
+        # автор уже есть в кэше celebrity_ids().
+        _check_celebrity(author_id, True)
+        return
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in _recent_posts(author_id)],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Разложить свежие посты автора по лентам всех его подписчиков."""
+    posts = list(_recent_posts(author_id))
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True).iterator()
+    entries = (
+        _entry(user_id, post) for user_id in followers for post in posts
+    )
+    for batch in _batches(entries, settings.TIMELINE_BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def prune(user_id, author_id):
+    """Убрать посты автора из ленты после отписки.
+
+    Если отписка опустила автора до TIMELINE_FANOUT_LIMIT, посты,
+    написанные им в роли «знаменитости», есть только в Post. Раскладывать
+    их по лентам всех подписчиков в запросе отписки слишком дорого,
+    поэтому автор встаёт в очередь TimelineBackfill (её разбирает
+    backfill_timelines), а до тех пор его посты подтягиваются при чтении.
+    """
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    followers = follower_count(author_id)
+    if followers > settings.TIMELINE_FANOUT_LIMIT:
+        return
+    if (followers == settings.TIMELINE_FANOUT_LIMIT
+            or author_id in celebrity_ids()):
+        TimelineBackfill.objects.get_or_create(author_id=author_id)
+        cache.delete(CELEBRITIES_CACHE_KEY)
+
+
+def backfill_pending():
+    """Разложить посты авторов из очереди TimelineBackfill, вернуть
+    число авторов."""
+    done = 0
+    for pending in TimelineBackfill.objects.order_by('created').iterator():
+        with transaction.atomic():
+            backfill_followers(pending.author_id)
+            pending.delete()
+        # Пока автор в кэше, его посты ещё и подтягиваются: это лишь
+        # дублирование, поэтому сбросить кэш можно и после записи.
+        cache.delete(CELEBRITIES_CACHE_KEY)
+        done += 1
+    return done
+
+
+def _entries_to_posts(entries):
+    return [entry.post for entry in entries]
+
+
+def follow_feed_paginator(user, per_page):
+    """Пагинатор ленты подписок.
+
+    Обычно лента читается одним диапазоном по индексу
+    (user, pub_date, post) таблицы TimelineEntry. Если пользователь
+    подписан на знаменитостей, их посты при записи не раскладываются,
+    и лента собирается из Post с подтягиванием этих авторов.
+    """
+    celebrities = celebrity_ids()
+    followed = celebrities and celebrities & followed_ids(user)
+    if followed:
+        in_timeline = Q(pk__in=TimelineEntry.objects.filter(
+            user=user).values('post_id'))
+        return CursorPaginator(
+            Post.objects.filter(
+                in_timeline | Q(author_id__in=followed)
+            ).select_related('author', 'group'),
+            per_page,
+        )
+    return CursorPaginator(
+        TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group'),
+        per_page,
+        key_fields=('pub_date', 'post_id'),
+        transform=_entries_to_posts,
+    )
+
+
+# То же, что backfill для каждой подписки, но одним запросом: последние
+# TIMELINE_BACKFILL_SIZE постов каждого автора, кроме знаменитостей.
+# Строки идут по владельцу ленты, чтобы индексы заполнялись почти подряд.
+REBUILD_SQL = '''
+INSERT INTO {timeline} (user_id, post_id, author_id, pub_date)
+SELECT follow.user_id, recent.id, recent.author_id, recent.pub_date
+FROM {follow} follow
+JOIN (
+    SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+        PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+    ) AS place
+    FROM {post}
+) recent ON recent.author_id = follow.author_id
+WHERE recent.place <= %s AND follow.author_id NOT IN (
+    SELECT author_id FROM {follow}
+    GROUP BY author_id HAVING COUNT(*) > %s
+)
+ORDER BY follow.user_id, recent.pub_date DESC
+'''
+
+
+def rebuild_timelines():
+    """Собрать все ленты заново по таблице Follow, вернуть число записей."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        TimelineEntry.objects.all().delete()
+        # Пересборка раскладывает и авторов из очереди.
+        TimelineBackfill.objects.all().delete()
+        cursor.execute(
+            REBUILD_SQL.format(
+                timeline=TimelineEntry._meta.db_table,
+                follow=Follow._meta.db_table,
+                post=Post._meta.db_table,
+            ),
+            [settings.TIMELINE_BACKFILL_SIZE, settings.TIMELINE_FANOUT_LIMIT],
+        )
+    cache.delete(CELEBRITIES_CACHE_KEY)
+    return TimelineEntry.objects.count()
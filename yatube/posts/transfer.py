@@ -0,0 +1,211 @@
+"""Потоковые выгрузка и загрузка постов в NDJSON и CSV.
+
+Посты читаются iterator(chunk_size=...) и пишутся по одной строке,
+загружаются пачками bulk_create; в памяти одновременно только одна
+пачка и словари авторов и групп, которые уже встречались. bulk_create
+не вызывает сигналы, поэтому счётчики, поиск и ленты подписчиков
+обновляются в транзакции каждой пачки только для её постов.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from core.caching import bump_version
+
+from .counters import posts_added, reconcile_post_counts
+from .models import Group, Post, User
+from .search import index_posts, rebuild_search_index
+from .signals import FEED_CACHE_NAMESPACE
+from .timelines import fan_out_posts, rebuild_timelines
+
+FIELDS = ('id', 'author', 'group', 'text', 'pub_date', 'image')
+FORMATS = ('ndjson', 'csv')
+
+
+def export_rows(chunk_size):
+    """Посты по возрастанию id в виде словарей с полями FIELDS."""
+    rows = Post.objects.order_by('pk').values_list(
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date', 'image'
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        row = dict(zip(FIELDS, row))
+        row['group'] = row['group'] or ''
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield row
+
+
+def write_rows(rows, stream, fmt):
+    """Записать строки в поток, вернуть их число."""
+    written = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        for written, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return written
+    for written, row in enumerate(rows, 1):
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write('\n')
+    return written
+
+
+def read_rows(stream, fmt):
+    """Строки файла; вместо строки с битым JSON — None."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Не подменять pub_date текущим временем при вставке."""
+    fields = [
+        model._meta.get_field('pub_date') for model in models or (Post,)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_insert(model, objs, batch_size):
+    """bulk_create пачками не больше, чем допускает база.
+
+    Django 2.2 не урезает явный batch_size до лимитов SQLite на число
+    параметров и частей составного SELECT, поэтому это делается здесь.
+    """
+    limit = connection.ops.bulk_batch_size(model._meta.concrete_fields, objs)
+    model.objects.bulk_create(objs, batch_size=min(batch_size, limit))
+
+
+class LookupMap(dict):
+    """Ключ → id; неизвестные ключи пачки ищутся одним запросом."""
+
+    def __init__(self, queryset, field):
+        super().__init__()
+        self.queryset = queryset
+        self.field = field
+
+    def resolve(self, keys):
+        missing = set(keys) - self.keys()
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for key in missing:
+                self[key] = found.get(key)
+
+
+def clean_row(row, keep_ids):
+    """Проверенные поля строки или None, если строку не загрузить."""
+    if not isinstance(row, dict):
+        return None
+    author, text = row.get('author'), row.get('text')
+    group, image = row.get('group') or '', row.get('image') or ''
+    if not all(isinstance(value, str)
+               for value in (author, text, group, image)):
+        return None
+    try:
+        pub_date = parse_datetime(row.get('pub_date') or '')
+        pk = int(row['id']) if keep_ids and row.get('id') else None
+    except (TypeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return {
+        'id': pk, 'author': author, 'group': group, 'text': text,
+        'pub_date': pub_date, 'image': image,
+    }
+
+
+def build_posts(rows, authors, groups, keep_ids):
+    """Посты пачки и число пропущенных строк: битых или с неизвестным
+    автором или группой."""
+    cleaned = [clean_row(row, keep_ids) for row in rows]
+    rows = [row for row in cleaned if row is not None]
+    authors.resolve(row['author'] for row in rows)
+    groups.resolve(row['group'] for row in rows if row['group'])
+    posts, skipped = [], len(cleaned) - len(rows)
+    for row in rows:
+        author_id = authors[row['author']]
+        group_id = groups[row['group']] if row['group'] else None
+        if author_id is None or (row['group'] and group_id is None):
+            skipped += 1
+            continue
+        posts.append(Post(
+            id=row['id'],
+            author_id=author_id,
+            group_id=group_id,
+            text=row['text'],
+            pub_date=row['pub_date'],
+            image=row['image'],
+        ))
+    return posts, skipped
+
+
+def insert_batch(posts, batch_size):
+    """Вставить пачку постов и сделать за сигналы то, что касается
+    только её: счётчики, поиск и ленты подписчиков её авторов."""
+    with transaction.atomic():
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        bulk_insert(Post, posts, batch_size)
+        # SQLite не возвращает id из bulk_create: новые id больше
+        # прежнего максимума, а заданные в файле уже есть у постов.
+        inserted = {post.pk: post for post in posts if post.pk is not None}
+        inserted.update(
+            (post.pk, post) for post in Post.objects.filter(
+                pk__gt=last_pk).only('pk', 'author_id', 'text', 'pub_date')
+        )
+        posts_added(posts)
+        index_posts(inserted.values())
+        fan_out_posts(inserted.values())
+
+
+def import_rows(rows, batch_size, keep_ids=False):
+    """Загрузить посты пачками, вернуть (загружено, пропущено).
+
+    Кэш лент сбрасывается и при ошибке: пачки до неё уже в базе.
+    """
+    authors = LookupMap(User.objects.all(), 'username')
+    groups = LookupMap(Group.objects.all(), 'slug')
+    rows = iter(rows)
+    created = skipped = 0
+    try:
+        with keep_pub_date():
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                posts, batch_skipped = build_posts(
+                    batch, authors, groups, keep_ids
+                )
+                insert_batch(posts, batch_size)
+                created += len(posts)
+                skipped += batch_skipped
+    finally:
+        if created:
+            bump_version(FEED_CACHE_NAMESPACE)
+    return created, skipped
+
+
+def refresh_derived_data():
+    """Пересобрать целиком то, что при обычном сохранении делают
+    сигналы."""
+    reconcile_post_counts()
+    rebuild_search_index()
+    rebuild_timelines()
+    bump_version(FEED_CACHE_NAMESPACE)
@@ -1,30 +1,64 @@
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.conf import settings
+from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from core.caching import get_version
+from core.replicas import replica_reads, sticks_to_primary
 
-from .models import Post, Group, User, Follow
+from .models import Follow, Group, Post, User
+from .conditional import (ConditionalFeed, http_cache_policy, make_etag,
+                          memoize, post_last_modified, post_state, viewer)
+from .counters import post_count
+from .feeds import (comments_feed, comments_visible, feed_sort, follow_feed,
+                    group_feed, index_feed, paginate, profile_feed)
+from .follows import follow_counts, followed_ids
 from .forms import PostForm, CommentForm
+from .search import SearchResults
+from .signals import FEED_CACHE_NAMESPACE
+from .suggestions import suggestions_for
+from .thumbnails import attach_thumbnails
 
 
-def pagination(post_list, request):
-    paginator = Paginator(post_list, settings.QUANTITY_POSTS)
-    return paginator.get_page(request.GET.get('page'))
+index_conditions = ConditionalFeed(
+    lambda request: index_feed(feed_sort(request)),
+    state=lambda request: viewer(request)
+)
 
 
+@replica_reads
+@http_cache_policy
+@index_conditions.condition
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = pagination(post_list, request)
+    page_obj = index_conditions.page(request)
     context = {
         'page_obj': page_obj,
+        'sort': feed_sort(request),
     }
     return render(request, 'posts/index.html', context)
 
 
+def _group(request, slug):
+    return memoize(
+        request, 'group', lambda: get_object_or_404(Group, slug=slug)
+    )
+
+
+group_conditions = ConditionalFeed(
+    lambda request, slug: group_feed(_group(request, slug)),
+    state=lambda request, slug: viewer(request),
+)
+
+
+@replica_reads
+@http_cache_policy
+@group_conditions.condition
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
-    page_obj = pagination(posts, request)
+    group = _group(request, slug)
+    page_obj = group_conditions.page(request, slug=slug)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -33,36 +67,120 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def _author(request, username):
+    return memoize(request, 'author', lambda: get_object_or_404(
+        User, username=username
+    ))
+
+
+def _follow_state(request, username):
+    """Подписки не сбрасывают версию лент, поэтому идут в ETag отдельно."""
+    author = _author(request, username)
+    return (
+        viewer(request),
+        author.pk in followed_ids(request.user),
+        memoize(request, 'follow_counts', lambda: follow_counts(author.pk)),
+    )
+
+
+profile_conditions = ConditionalFeed(
+    lambda request, username: profile_feed(_author(request, username)),
+    state=_follow_state,
+)
+
+
+@replica_reads
+@http_cache_policy
+@profile_conditions.condition
 def profile(request, username):
-    author = User.objects.get(username=username)
-    post_list = author.posts.select_related('group')
-    page_obj = pagination(post_list, request)
-    following = (request.user.is_authenticated and author.following.filter(
-        user=request.user).exists()
+    author = _author(request, username)
+    page_obj = profile_conditions.page(request, username=username)
+    _, following, (follower_count, following_count) = _follow_state(
+        request, username
     )
     context = {
         'page_obj': page_obj,
         'author': author,
         'profile': True,
-        'following': following
+        'following': following,
+        'follower_count': follower_count,
+        'following_count': following_count
     }
     return render(request, 'posts/profile.html', context)
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(
+def comments_page(post_id, request):
+    return comments_feed(post_id).get_cursor_page(request.GET.get('cursor'))
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), settings.QUANTITY_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    attach_thumbnails(page_obj.object_list)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def _post(request, post_id):
+    return memoize(request, 'post', lambda: get_object_or_404(
         Post.objects.select_related('author', 'group'), pk=post_id
+    ))
+
+
+def _post_etag(request, post_id):
+    # Версия лент меняется и с новыми постами автора, и с правкой группы.
+    return make_etag(
+        get_version(FEED_CACHE_NAMESPACE),
+        *post_state(_post(request, post_id)),
+        request.get_full_path(),
+        viewer(request),
     )
+
+
+@replica_reads
+@http_cache_policy
+@condition(
+    etag_func=_post_etag,
+    last_modified_func=lambda request, post_id: post_last_modified(
+        _post(request, post_id)
+    ),
+)
+def post_detail(request, post_id):
+    post = _post(request, post_id)
+    page = None
+    if comments_visible(request, post):
+        page = comments_page(post.pk, request)
     context = {
         'post': post,
-        'post_count': post.author.posts.count(),
+        'post_count': post_count(author_id=post.author_id),
         'form': CommentForm(),
-        'comments': post.comments.all()
+        'comments': page.object_list if page else [],
+        'comments_page': page
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(
+        Post.objects.only('pk', 'author_id'), pk=post_id
+    )
+    if not comments_visible(request, post):
+        raise Http404
+    page = comments_page(post.pk, request)
+    context = {
+        'post': post,
+        'comments': page.object_list,
+        'comments_page': page
+    }
+    return render(request, 'includes/comments_list.html', context)
+
+
 @login_required
+@sticks_to_primary
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -81,6 +199,7 @@ def post_create(request):
 
 
 @login_required
+@sticks_to_primary
 def post_edit(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related('author', 'group'), pk=post_id
@@ -106,6 +225,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@sticks_to_primary
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -113,22 +233,24 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    post_list = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user)
-    page_obj = pagination(post_list, request)
+    page_obj = paginate(follow_feed(request.user), request)
     context = {
         'page_obj': page_obj,
+        'suggestions': suggestions_for(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@sticks_to_primary
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user.username == author.username:
@@ -138,6 +260,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@sticks_to_primary
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -33,6 +33,40 @@ ALLOWED_HOSTS = [
 ]
 
 QUANTITY_POSTS = 10
+QUANTITY_COMMENTS = 20
+
+# Сколько секунд обратный прокси может отдавать анонимам HTML-ленты
+# без обращения к Django.
+HTML_CACHE_MAX_AGE = int(os.environ.get('YATUBE_HTML_CACHE_MAX_AGE', 60))
+
+# Кэш целых страниц (core.middleware.PageCacheMiddleware): представление
+# и пространство имён versioned-кэша, сброс которого делает страницу
+# устаревшей. По умолчанию выключен в DEBUG, чтобы правки шаблонов и
+# context в тестах были видны сразу.
+PAGE_CACHE_ENABLED = os.environ.get(
+    'YATUBE_PAGE_CACHE', '0' if DEBUG else '1'
+) == '1'
+PAGE_CACHE_VIEWS = {
+    'posts:index': 'feed',
+    'posts:group_list': 'feed',
+}
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Лента подписок: посты авторов с числом подписчиков больше лимита не
+# раскладываются по лентам при записи, а подтягиваются при чтении.
+# Авторов, опустившихся ниже лимита, раскладывает manage.py
+# backfill_timelines (запускать по расписанию).
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL_SIZE = 500
+TIMELINE_BATCH_SIZE = 1000
+TIMELINE_CELEBRITIES_TIMEOUT = 300
+
+# Множество авторов, на которых подписан пользователь, сбрасывается
+# при подписке и отписке; таймаут лишь страховка.
+FOLLOWED_IDS_TIMEOUT = 60 * 60
+
+# Сколько подсказок «кого почитать» хранить и показывать пользователю.
+FOLLOW_SUGGESTIONS = 10
 
 
 # Application definition
@@ -52,7 +86,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,7 +103,7 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -92,9 +128,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Сколько секунд держать соединение между запросами; в DEBUG
+        # соединение открывается заново, как раньше.
+        'CONN_MAX_AGE': int(os.environ.get(
+            'YATUBE_CONN_MAX_AGE', 0 if DEBUG else 60
+        )),
     }
 }
 
+# PRAGMA для каждого нового соединения SQLite (core.db); пустое
+# значение в окружении оставляет настройку SQLite по умолчанию.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('YATUBE_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('YATUBE_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': os.environ.get('YATUBE_SQLITE_BUSY_TIMEOUT', 5000),
+    'mmap_size': os.environ.get('YATUBE_SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': os.environ.get('YATUBE_SQLITE_CACHE_SIZE', -64 * 1024),
+}
+
+# Реплики только для чтения (core.replicas): YATUBE_DB_REPLICAS — пути
+# к копиям базы через запятую. С них читают ленты и страницы постов;
+# после записи пользователь REPLICA_STICKY_SECONDS секунд читает с default.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('YATUBE_REPLICA_STICKY', 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -147,8 +214,48 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры загруженных картинок создаются фоновым пулом потоков,
+# 0 — создавать сразу при сохранении формы (по умолчанию в DEBUG, чтобы
+# ошибки были видны в запросе и не было гонок с временными MEDIA_ROOT).
+THUMBNAIL_PREGENERATE_WORKERS = int(os.environ.get(
+    'YATUBE_THUMBNAIL_WORKERS', 0 if DEBUG else 2
+))
+
+# Загрузки больше этого размера пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Картинки постов уменьшаются до POST_IMAGE_MAX_SIZE пикселей по большей
+# стороне, теряют метаданные и хранятся в POST_IMAGE_FORMAT; если Pillow
+# собран без нужного кодека, остаётся исходный формат.
+POST_IMAGE_MAX_SIZE = int(os.environ.get('YATUBE_POST_IMAGE_MAX_SIZE', 1920))
+POST_IMAGE_FORMAT = os.environ.get('YATUBE_POST_IMAGE_FORMAT', 'WEBP')
+POST_IMAGE_QUALITY = 80
+
+# Кэш выбирается через YATUBE_CACHE_BACKEND. locmem у каждого воркера
+# свой, поэтому сброс версий фрагментов и страниц не доходит до соседних
+# воркеров; в продакшене нужен общий: file (LOCATION — каталог),
+# memcached (host:port, нужен python-memcached) или redis
+# (redis://host:port/db, подойдёт и manage.py run_cache_server).
+CACHE_BACKENDS = {
+    'locmem': 'core.cache.LocMemCache',
+    'file': 'core.cache.FileBasedCache',
+    'memcached': 'core.cache.MemcachedCache',
+    'redis': 'core.cache.RedisCache',
+}
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'locmem')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', ''),
+        'KEY_PREFIX': os.environ.get('YATUBE_CACHE_KEY_PREFIX', 'yatube'),
+        'VERSION': int(os.environ.get('YATUBE_CACHE_VERSION', 1)),
+        # Значения длиннее порога (байт) сжимаются; 0 — не сжимать.
+        'COMPRESS_MIN_LENGTH': int(os.environ.get(
+            'YATUBE_CACHE_COMPRESS_MIN_LENGTH', 1024
+        )),
     }
 }
+
+# Журнал замеров QueryBudgetMiddleware для команды query_budget_report.
+QUERY_BUDGET_LOG = os.environ.get('YATUBE_QUERY_BUDGET_LOG')